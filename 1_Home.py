@@ -2,13 +2,16 @@ import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 import streamlit as st
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageOps
 from streamlit.components.v1 import html
 
 from modules import components, models, utils
 from modules.utils import get_dominant_colors
 from modules.config import PATHS
 from modules.color_util import categorize_color_family
+from modules.thumbnails import thumbnail_path
+from modules.corpus_detections import OBJECT_DISPLAY_NAMES
+from modules.admission import GATES
 
 excluded_categories = {"Ceramic floor", "Wooden floor"}
 
@@ -160,11 +163,17 @@ def init_session():
         "selected_items": [],
         "landing_done": False,
         "uploaded_file_path": None,
+        "upload_key": None,
+        "analysis_jobs": {},
+        "room_palette": None,
         "last_uploaded_file": None,
         "detected_results": None,
         "result_image": None,
         "detected_image": None,
         "dominant_colors": [],
+        "object_colors": {},
+        "room_hex": [],
+        "object_hex": {},
     }
 
     for key, value in session_defaults.items():
@@ -281,11 +290,18 @@ def render_sidebar_controls():
                 st.session_state.selected_items = [item_mapping.get(item, item) for item in selected_items_display]
 
                 if st.session_state.uploaded_file_path:
-                    hex_colors = get_dominant_colors(
-                        st.session_state.uploaded_file_path
-                    )
+                    hex_colors = cached_dominant_colors()
                     color_families = list(set(categorize_color_family(hex_code) for hex_code in hex_colors if hex_code))
                     st.session_state.dominant_colors = color_families
+                    # Category -> families seen on that object in the photo (e.g. the sofa's colors for sofas).
+                    object_palettes = (st.session_state.detected_results or {}).get('object_palettes', {})
+                    st.session_state.object_colors = {
+                        category: sorted(set(categorize_color_family(hex_code) for hex_code in palette))
+                        for category, palette in object_palettes.items()
+                    }
+                    # Exact colors too, for perceptual (CIELAB) product matching on the Packages page.
+                    st.session_state.room_hex = hex_colors
+                    st.session_state.object_hex = object_palettes
 
                 st.switch_page("pages/2_Preferences.py")
             else:
@@ -311,7 +327,7 @@ def render_landing():
             st.rerun()
 
 # Enhanced file upload handling
-def handle_file_upload():
+def handle_file_upload(yolo_model, resnet_model):
     st.markdown("""
     <div style="margin: 2rem 0; text-align: center;">
         <h3 class="section-heading">Upload Your Room Image</h3>
@@ -333,19 +349,26 @@ def handle_file_upload():
     
     if uploaded_file:
         if uploaded_file != st.session_state.last_uploaded_file:
-            process_new_upload(uploaded_file)
+            process_new_upload(uploaded_file, yolo_model, resnet_model)
 
-def process_new_upload(uploaded_file):
+def process_new_upload(uploaded_file, yolo_model, resnet_model):
     with st.spinner("🌌 Powering Up the Design Matrix..."):
         try:
+            # The file is named by its content hash, so the key and the analysed path refer to the same bytes.
             file_path = utils.save_uploaded_file(uploaded_file)
             st.session_state.uploaded_file_path = file_path
+            st.session_state.upload_key = models.load_analysis_cache().key(uploaded_file.getvalue())
             st.session_state.last_uploaded_file = uploaded_file
             reset_detection_state()
+            # Detection, palette and embedding all start now, in parallel; see publish_analysis.
+            st.session_state.analysis_jobs = models.load_upload_pipeline().submit(
+                st.session_state.upload_key, file_path, yolo_model, resnet_model
+            )
             st.rerun()
         except Exception as e:
             st.error(f"Error processing upload: {str(e)}")
             st.session_state.uploaded_file_path = None
+            st.session_state.upload_key = None
             st.session_state.last_uploaded_file = None
 
 def reset_detection_state():
@@ -354,8 +377,53 @@ def reset_detection_state():
     st.session_state.detected_image = None
     st.session_state.selected_items = []
     st.session_state.dominant_colors = []
+    st.session_state.object_colors = {}
+    st.session_state.room_hex = []
+    st.session_state.object_hex = {}
     st.session_state.detected_results = None
     st.session_state.result_image = None
+    st.session_state.analysis_jobs = {}
+    st.session_state.room_palette = None
+
+def analysis_pending(stage=None):
+    jobs = st.session_state.analysis_jobs
+    return stage in jobs if stage else bool(jobs)
+
+def publish_analysis(index):
+    """Move finished upload stages into the session, each as soon as it completes."""
+    jobs = st.session_state.analysis_jobs
+    for stage, future in list(jobs.items()):
+        if not future.done():
+            continue
+        del jobs[stage]
+        try:
+            result = future.result()
+        except Exception as e:
+            st.error(f"{stage.capitalize()} failed: {e}")
+            continue
+        if stage == 'detections':
+            apply_detections(result)
+        elif stage == 'palette':
+            st.session_state.room_palette = result
+        elif stage == 'embedding' and not st.session_state.detected_image:
+            # First similar rooms need no click; the button re-runs the search with filters.
+            bitmaps = models.load_object_bitmaps()
+            mask = bitmaps.mask(st.session_state.get("filter_include", []), st.session_state.get("filter_exclude", []))
+            apply_recommendations(result, index, mask)
+
+@st.fragment(run_every=0.5)
+def watch_analysis():
+    # Polls the running stages and reruns the page when one has finished.
+    if any(future.done() for future in st.session_state.analysis_jobs.values()):
+        st.rerun()
+    for stage, gate in (('detections', 'detection'), ('embedding', 'embedding')):
+        position = GATES[gate].position(st.session_state.upload_key) if analysis_pending(stage) else 0
+        if position:
+            st.caption(f"⏳ Busy right now: you are #{position} in line for {gate}.")
+
+def show_place_in_line(placeholder, job):
+    # on_wait callback for admission gates when the script thread itself waits.
+    return lambda position: placeholder.caption(f"⏳ Busy right now: you are #{position} in line for {job}.")
 
 # Enhanced image display columns
 def display_image_columns(yolo_model):
@@ -368,15 +436,17 @@ def display_image_columns(yolo_model):
         col_img1, col_img2 = st.columns(2)
         with col_img1:
             st.image(
-                Image.open(st.session_state.uploaded_file_path),
+                ImageOps.exif_transpose(Image.open(st.session_state.uploaded_file_path)),
                 caption="Original Dimension",
                 use_column_width=True,
                 output_format="PNG"
             )
 
-            if st.session_state.uploaded_file_path:
+            if st.session_state.uploaded_file_path and analysis_pending('palette'):
+                st.caption("Extracting dominant colors...")
+            elif st.session_state.uploaded_file_path:
                 try:
-                    hex_colors_display = get_dominant_colors(st.session_state.uploaded_file_path)
+                    hex_colors_display = st.session_state.room_palette or cached_dominant_colors()
                     if hex_colors_display:
                         st.markdown("<h6 style='color: #2d3748;'>Dominant Colors</h6>", unsafe_allow_html=True)
                         num_colors = len(hex_colors_display)
@@ -393,65 +463,90 @@ def display_image_columns(yolo_model):
                 except Exception as e:
                     st.error(f"Error extracting colors: {e}")
 
-        if st.session_state.detected_results is None:
+        if st.session_state.detected_results is None and not analysis_pending('detections'):
             process_object_detection(yolo_model)
 
         with col_img2:
-            if st.session_state.result_image:
-                st.image(
-                    st.session_state.result_image,
-                    caption="AI Vision",
-                    use_column_width=True,
-                    output_format="PNG"
-                )
+            if st.session_state.detected_results is not None:
+                try:
+                    st.image(
+                        annotated_image(),
+                        caption="AI Vision",
+                        use_column_width=True,
+                        output_format="JPEG"
+                    )
+                except Exception as e:
+                    st.error(f"Could not draw detections: {e}")
+            elif analysis_pending('detections'):
+                st.caption("🔮 Decrypting Your Room's Essence...")
             else:
                 st.caption("Object detection pending or failed.")
 
         st.markdown("</div>", unsafe_allow_html=True)
 
+def cached_dominant_colors():
+    # Same photo (any session, any reload) -> palette served from the analysis cache.
+    return models.load_analysis_cache().get_or_compute(
+        st.session_state.upload_key,
+        'palette',
+        lambda: get_dominant_colors(st.session_state.uploaded_file_path)
+    )
+
 def process_object_detection(yolo_model):
+    line = st.empty()
     with st.spinner("🔮 Decrypting Your Room's Essence..."):
         try:
-            results = utils.detect_objects(
-                st.session_state.uploaded_file_path,
-                yolo_model
+            detections = models.load_analysis_cache().get_or_compute(
+                st.session_state.upload_key,
+                'detections',
+                lambda: GATES['detection'].run(
+                    lambda: utils.summarize_detections(
+                        utils.detect_objects(st.session_state.uploaded_file_path, yolo_model)
+                    ),
+                    on_wait=show_place_in_line(line, "detection")
+                )
             )
-            st.session_state.detected_results = results 
-            img_with_boxes = results.plot() 
-            img_rgb = img_with_boxes[..., ::-1]
-            st.session_state.result_image = Image.fromarray(img_rgb)
-
-            detected_objects = set()
-            object_display_mapping = { 
-                "sofa": "Sofa",
-                "curtains": "Curtains",
-                "wooden-floor": "Wooden Floor",
-                "floor-lamps": "Nightstand", 
-                "painting": "Painting",
-                "cabinet": "Cabinet",
-                "frame": "Frame",
-                "center-table": "Table",
-                "chair-wooden": "Chair"
-            }
-
-            if results.boxes:
-                for box in results.boxes:
-                    internal_cls_name = results.names[int(box.cls.numpy()[0])]
-                    display_name = object_display_mapping.get(internal_cls_name, internal_cls_name)
-                    detected_objects.add(display_name)
-
-            st.session_state.detected_objects = detected_objects if detected_objects else set()
+            line.empty()
+            apply_detections(detections)
 
         except Exception as e:
              st.error(f"Object detection failed: {e}")
              st.session_state.detected_results = None
              st.session_state.result_image = None
 
+def annotated_image():
+    # Drawn only when shown, then kept as JPEG bytes in the session and the analysis cache.
+    if st.session_state.result_image is None:
+        st.session_state.result_image = models.load_analysis_cache().get_or_compute(
+            st.session_state.upload_key,
+            'annotated',
+            lambda: utils.render_detections(st.session_state.uploaded_file_path, st.session_state.detected_results)
+        )
+    return st.session_state.result_image
+
+def apply_detections(detections):
+    st.session_state.detected_results = detections
+    st.session_state.result_image = None
+
+    detected_objects = set()
+    for internal_cls_name in utils.detection_labels(detections):
+        display_name = OBJECT_DISPLAY_NAMES.get(internal_cls_name, internal_cls_name)
+        detected_objects.add(display_name)
+
+    st.session_state.detected_objects = detected_objects if detected_objects else set()
+
+def apply_recommendations(features, index, mask=None):
+    paths, _ = models.load_catalog()
+    indices = utils.recommend(features, index, mask=mask)
+    recommended_filenames = [os.path.basename(paths[i]) for i in indices][:5]
+    if recommended_filenames:
+        st.session_state.detected_image = recommended_filenames
+        st.session_state.recommended_objects = utils.get_recommended_objects(recommended_filenames)
+    return recommended_filenames
+
 # Enhanced recommendations section
-def display_recommendations(filenames):
-    # print(filenames)
-    filenames=[path.replace('\\', '/') for path in filenames]
-    print(filenames)
+def display_recommendations():
+    paths, by_name = models.load_catalog()
     with st.container():
         st.markdown("""
         <div class="card fade-in">
@@ -463,14 +558,12 @@ def display_recommendations(filenames):
             for i, img_name in enumerate(st.session_state.detected_image):
                 with cols[i]:
                     try:
-                        matching_files = [f for f in filenames if os.path.basename(f) == img_name]
-                        if matching_files:
-                            img_path = matching_files[0]
+                        if img_name in by_name:
                             st.image(
-                                img_path,
+                                thumbnail_path(paths[by_name[img_name]]),
                                 use_column_width=True,
                                 caption=f"Inspiration {i+1}",
-                                output_format="PNG"
+                                output_format="JPEG"
                             )
                         else:
                             st.error(f"Image {img_name} not found.")
@@ -481,44 +574,58 @@ def display_recommendations(filenames):
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-def handle_recommendations(resnet_model, feature_list, filenames):
-    print("inside handle reommendation")
-    filenames=[path.replace('\\', '/') for path in filenames]
-    print(filenames)
+def handle_recommendations(resnet_model, index):
+    bitmaps = models.load_object_bitmaps()
+    with st.expander("Filter similar rooms by objects"):
+        col_in, col_out = st.columns(2)
+        with col_in:
+            must_have = st.multiselect("Rooms that have", options=bitmaps.names, key="filter_include")
+        with col_out:
+            must_lack = st.multiselect("Rooms without", options=bitmaps.names, key="filter_exclude")
+
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
         button_disabled = st.session_state.uploaded_file_path is None
         if enhanced_button("View Top Similar Rooms", key="find_similar", use_container_width=True, disabled=button_disabled):
+            line = st.empty()
             with st.spinner(" Warping Through Design Space..."):
                 try:
-                    features = utils.feature_extraction(
-                        st.session_state.uploaded_file_path,
-                        resnet_model
+                    features = models.load_analysis_cache().get_or_compute(
+                        st.session_state.upload_key,
+                        'embedding',
+                        lambda: GATES['embedding'].run(
+                            utils.feature_extraction,
+                            st.session_state.uploaded_file_path,
+                            resnet_model,
+                            on_wait=show_place_in_line(line, "similar rooms")
+                        )
                     )
+                    line.empty()
                     if features is not None:
-                        indices = utils.recommend(features, feature_list)
-                        recommended_filenames = [os.path.basename(filenames[i]) for i in indices][:5]
-                        st.session_state.detected_image = recommended_filenames 
-                        st.session_state.recommended_objects = utils.get_recommended_objects(recommended_filenames)
-                        st.rerun() 
+                        if apply_recommendations(features, index, bitmaps.mask(must_have, must_lack)):
+                            st.rerun()
+                        else:
+                            st.warning("No rooms match the selected object filters.")
                     else:
                          st.warning("Could not extract features from the image.")
                 except Exception as e:
                     st.error(f"Failed to get recommendations: {str(e)}")
 
     if st.session_state.detected_image:
-        display_recommendations(filenames) 
+        display_recommendations()
 
-def process_main_flow(yolo_model, resnet_model, feature_list, filenames):
+def process_main_flow(yolo_model, resnet_model, index):
 
-    handle_file_upload()
+    handle_file_upload(yolo_model, resnet_model)
     if st.session_state.uploaded_file_path:
         display_image_columns(yolo_model)
 
-        if not st.session_state.detected_objects:
+        if analysis_pending('detections'):
+            st.info("Analyzing your room...")
+        elif not st.session_state.detected_objects:
             st.warning("⚠️ No objects detected. Please upload a picture with detectable furniture or decor.")
         else:
-            handle_recommendations(resnet_model, feature_list, filenames)
+            handle_recommendations(resnet_model, index)
 
 # Main function with enhanced UI
 def main():
@@ -536,12 +643,14 @@ def main():
     # Removed components.render_header() to eliminate duplicate heading
 
     def load_models_and_features():
-        yolo_model = models.load_yolo()
-        resnet_model = models.load_resnet()
-        feature_list, filenames = models.load_features()
-        return yolo_model, resnet_model, feature_list, filenames
+        server = models.load_inference_server()
+        yolo_model, resnet_model = server.detector, server.embedder
+        index = models.load_index()
+        return yolo_model, resnet_model, index
+
+    yolo_model, resnet_model, index = load_models_and_features()
 
-    yolo_model, resnet_model, feature_list, filenames = load_models_and_features()
+    publish_analysis(index)
 
     with st.sidebar:
         render_sidebar_controls()
@@ -549,7 +658,10 @@ def main():
     if not st.session_state.landing_done:
         render_landing()
     else:
-        process_main_flow(yolo_model, resnet_model, feature_list, filenames)
+        process_main_flow(yolo_model, resnet_model, index)
+
+    if analysis_pending():
+        watch_analysis()
 
 if __name__ == "__main__":
     # print(os.listdir("Livingroom"))
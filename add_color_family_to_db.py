@@ -1,55 +1,38 @@
-import mysql.connector
-import traceback
-from modules.color_util import categorize_color_family  # Importing from your separate file
+import argparse
+import time
 
-# ---------- Step 1: Connect to DB ----------
-print("🔄 Connecting to MySQL database...")
+from modules.config import CATALOG
+from modules.catalog_writer import open_catalog, CATALOG_BACKENDS
+from modules.color_util import categorize_color_family
 
-try:
-    db = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="Pujan@111",
-        database="product_db"
-    )
-    print("✅ Connected to MySQL successfully!")
-except Exception as e:
-    print("❌ Could not connect to MySQL:", e)
-    traceback.print_exc()
-    exit()
-
-cursor = db.cursor()
+parser = argparse.ArgumentParser(description="Replace each product's hex color with its color family name.")
+parser.add_argument('--backend', choices=sorted(CATALOG_BACKENDS), default=CATALOG['backend'])
+parser.add_argument('--chunk-size', type=int, default=CATALOG['chunk_size'], help="Rows per executemany/transaction")
+args = parser.parse_args()
 
-# ---------- Step 2: Get Products with Hex Colors ----------
-cursor.execute("SELECT id, color FROM products;")  # Fetch id and color (hex) instead of image_url
-products = cursor.fetchall()
+print(f"🔄 Opening {args.backend} catalog...")
+catalog = open_catalog(args.backend, chunk_size=args.chunk_size)
+products = catalog.read(['id', 'color'])
 print(f"✅ Found {len(products)} products.")
 
-# ---------- Step 3: Process Products ----------
-for prod in products:
-    prod_id, hex_color = prod
-    print(f"\n🔄 Processing Product ID {prod_id}")
-
-    if not hex_color or not hex_color.startswith("#"):
+start = time.perf_counter()
+families, rows = {}, []
+for prod_id, hex_color in zip(products['id'], products['color']):
+    if not isinstance(hex_color, str) or not hex_color.startswith("#"):
         print(f"⚠️ Invalid hex color for product {prod_id}: {hex_color}")
         continue
-
     try:
-        color_name = categorize_color_family(hex_color)  # Convert hex to color family name
-        print(f"🎨 Hex Color: {hex_color} -> {color_name}")
-        sql = "UPDATE products SET color=%s WHERE id=%s"
-        cursor.execute(sql, (color_name, prod_id))
-        print(f"✅ Updated product {prod_id} with color: {color_name}")
+        if hex_color not in families:
+            families[hex_color] = categorize_color_family(hex_color)
+        rows.append((families[hex_color], int(prod_id)))
     except Exception as e:
-        print(f"❌ Error updating product {prod_id}:", e)
+        print(f"❌ Error categorizing product {prod_id}:", e)
 
-# ---------- Step 4: Commit and Close ----------
 try:
-    db.commit()
-    print("💾 All changes committed to database.")
+    written = catalog.update(rows, ['color'])
+    print(f"💾 Updated {written} products in {time.perf_counter() - start:.2f}s.")
 except Exception as e:
-    print("❌ Commit failed:", e)
-
-cursor.close()
-db.close()
-print("✅ Script completed.")
\ No newline at end of file
+    print("❌ Update failed:", e)
+finally:
+    catalog.close()
+print("✅ Script completed.")
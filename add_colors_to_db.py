@@ -1,28 +1,14 @@
-import mysql.connector
 import requests
 from io import BytesIO
 from colorthief import ColorThief
-import traceback
 
-print("🔄 Connecting to MySQL database...")
+from modules.catalog_writer import open_catalog
 
-try:
-    db = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="Pujan@111",
-        database="product_db"
-    )
-    print("✅ Connected to MySQL successfully!")
-except Exception as e:
-    print("❌ Could not connect to MySQL:", e)
-    traceback.print_exc()
-    exit()
+# Serial fallback; extract_product_colors.py is the concurrent, cached version of this job.
+print("🔄 Opening product catalog...")
+catalog = open_catalog()
 
-cursor = db.cursor()
-
-cursor.execute("SELECT id, image_url FROM products;")
-products = cursor.fetchall()
+products = catalog.read(['id', 'image_url'])
 print(f"✅ Found {len(products)} products.")
 
 
@@ -43,32 +29,26 @@ def get_dominant_colors(image_url, num_colors=3):
         return [None] * num_colors
 
 
-for prod in products:
-    prod_id, image_url = prod
+rows = []
+for prod_id, image_url in zip(products['id'], products['image_url']):
     print(f"\n🔄 Processing Product ID {prod_id}")
 
-    if not image_url or not image_url.startswith("http"):
+    if not isinstance(image_url, str) or not image_url.startswith("http"):
         print(f"⚠️ Invalid image URL for product {prod_id}: {image_url}")
         continue
 
     colors = get_dominant_colors(image_url)
     if colors and None not in colors:
         print(f"🎨 Extracted Colors: {colors}")
-        try:
-            sql = "UPDATE products SET color1=%s, color2=%s, color3=%s WHERE id=%s"
-            cursor.execute(sql, (colors[0], colors[1], colors[2], prod_id))
-            print(f"✅ Updated product {prod_id} successfully.")
-        except Exception as e:
-            print(f"❌ Error updating product {prod_id}:", e)
+        rows.append((colors[0], colors[1], colors[2], int(prod_id)))
     else:
         print(f"⚠️ Skipped product {prod_id} due to missing or invalid colors.")
 
 try:
-    db.commit()
-    print("💾 All changes committed to database.")
+    written = catalog.update(rows, ['color1', 'color2', 'color3'])
+    print(f"💾 Updated {written} products.")
 except Exception as e:
-    print("❌ Commit failed:", e)
-
-cursor.close()
-db.close()
+    print("❌ Update failed:", e)
+finally:
+    catalog.close()
 print("✅ Script completed.")
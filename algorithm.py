@@ -1,6 +1,8 @@
 import random
 import math
 import copy
+import time
+import numpy as np
 
 def total_cost(candidate):
     return sum(candidate["user"].values()) + sum(candidate["extra"].values())
@@ -143,25 +145,192 @@ def crossover(parent1, parent2, user_cats, extra_cats, total_budget, min_max):
     child2 = repair_candidate(child2, user_cats, extra_cats, min_max, total_budget)
     return child1, child2
 
-def genetic_algorithm(user_cats, extra_cats, avg_prices, min_max, total_budget, population_size=50, generations=100):
+def new_stats():
+    """Work counters filled in by both engines: fitness evaluations, candidate repairs and seconds per generation."""
+    return {"evaluations": 0, "repairs": 0, "generation_seconds": []}
+
+def init_stats(stats):
+    # A caller's dict (even {}) gets the missing counters; counts already in it keep accumulating.
+    stats.update({**new_stats(), **stats})
+    return stats
+
+def genetic_algorithm(user_cats, extra_cats, avg_prices, min_max, total_budget, population_size=50, generations=100, stats=None):
+    # Each candidate's fitness is computed once and kept in `fits`, index-aligned with `population`.
+    stats = new_stats() if stats is None else init_stats(stats)
+
+    def evaluate(cand):
+        stats["evaluations"] += 1
+        return fitness(cand, avg_prices, min_max, total_budget)
+
     population = [initialize_candidate(user_cats, extra_cats, min_max, total_budget) for _ in range(population_size)]
-    best = None
+    stats["repairs"] += population_size
+    fits = [evaluate(cand) for cand in population]
+    best, best_fit = None, math.inf
     for gen in range(generations):
-        population = [repair_candidate(cand, user_cats, extra_cats, min_max, total_budget) for cand in population]
-        fitnesses = [fitness(cand, avg_prices, min_max, total_budget) for cand in population]
-        gen_best = min(population, key=lambda c: fitness(c, avg_prices, min_max, total_budget))
-        if best is None or fitness(gen_best, avg_prices, min_max, total_budget) < fitness(best, avg_prices, min_max, total_budget):
-            best = gen_best
-        new_population = []
+        start = time.perf_counter()
+        for i, cand in enumerate(population):
+            before = (dict(cand["user"]), dict(cand["extra"]))
+            repair_candidate(cand, user_cats, extra_cats, min_max, total_budget)
+            stats["repairs"] += 1
+            if (cand["user"], cand["extra"]) != before:
+                fits[i] = evaluate(cand)
+        gen_best = min(range(len(population)), key=fits.__getitem__)
+        if fits[gen_best] < best_fit:
+            best, best_fit = population[gen_best], fits[gen_best]
+        new_population, new_fits = [], []
         while len(new_population) < population_size:
-            tournament = random.sample(population, 3)
-            parent1 = min(tournament, key=lambda c: fitness(c, avg_prices, min_max, total_budget))
-            tournament = random.sample(population, 3)
-            parent2 = min(tournament, key=lambda c: fitness(c, avg_prices, min_max, total_budget))
+            parent1 = population[min(random.sample(range(len(population)), 3), key=fits.__getitem__)]
+            parent2 = population[min(random.sample(range(len(population)), 3), key=fits.__getitem__)]
             child1, child2 = crossover(parent1, parent2, user_cats, extra_cats, total_budget, min_max)
             child1 = mutate(child1, user_cats, extra_cats, min_max, total_budget)
             child2 = mutate(child2, user_cats, extra_cats, min_max, total_budget)
+            stats["repairs"] += 4
             new_population.extend([child1, child2])
-        population = new_population[:population_size]
-    population.sort(key=lambda c: fitness(c, avg_prices, min_max, total_budget))
-    return population[:5]
+            new_fits.extend([evaluate(child1), evaluate(child2)])
+        population, fits = new_population[:population_size], new_fits[:population_size]
+        stats["generation_seconds"].append(time.perf_counter() - start)
+    order = sorted(range(len(population)), key=fits.__getitem__)
+    return [population[i] for i in order[:5]]
+
+# ---------- Array-backed engine ----------
+# Same model as above, but the population is a (population x categories)
+# matrix of allocations: user categories first, then extra categories, where
+# an extra category is included when its allocation is > 0. Repair, mutation,
+# crossover and fitness each run on the whole population at once.
+
+class ArrayGA:
+    def __init__(self, user_cats, extra_cats, avg_prices, min_max, total_budget,
+                 penalty_factor=1e8, extra_reward=100, mutation_rate=0.2, mutation_scale=0.1, seed=None):
+        self.user_cats = list(user_cats)
+        self.extra_cats = list(extra_cats)
+        self.n_user = len(self.user_cats)
+        cats = self.user_cats + self.extra_cats
+        self.lo = np.array([min_max[cat][0] for cat in cats], dtype=np.float64)
+        self.hi = np.array([min_max[cat][1] for cat in cats], dtype=np.float64)
+        # Categories without an average price contribute no deviation (as avg_prices.get(cat, alloc) does).
+        self.has_avg = np.array([cat in avg_prices for cat in cats])
+        self.avg = np.array([avg_prices.get(cat, 0.0) for cat in cats], dtype=np.float64)
+        self.total_budget = float(total_budget)
+        self.penalty_factor = penalty_factor
+        self.extra_reward = extra_reward
+        self.mutation_rate = mutation_rate
+        self.mutation_scale = mutation_scale
+        self.rng = np.random.default_rng(seed)
+        self.stats = new_stats()
+
+    def repair(self, X):
+        """repair_candidate for every row: user allocations fixed, extras rescaled to fill the budget."""
+        X = X.copy()
+        self.stats["repairs"] += len(X)
+        U, B = self.n_user, self.total_budget
+        if self.lo[:U].sum() > B:
+            X[:, :U] = self.lo[:U]
+            X[:, U:] = 0.0
+            return X
+        user_total = X[:, :U].sum(axis=1)
+        extra = X[:, U:]
+        extra_total = extra.sum(axis=1)
+        rows = extra_total != 0
+        if not rows.any():
+            return X
+        lo, hi = self.lo[U:], self.hi[U:]
+        remaining = B - user_total[rows]
+        scaled = extra[rows] / extra_total[rows, None] * remaining[:, None]
+        extra[rows] = np.where(extra[rows] > 0, np.clip(scaled, lo, hi), 0.0)
+        # Spread any shortfall left by clamping over the extras still below their max.
+        diff = B - user_total - extra.sum(axis=1)
+        short = rows & (np.abs(diff) > 1e-3) & (diff > 0)
+        if short.any():
+            gap = np.where(extra[short] < hi, hi - extra[short], 0.0)
+            total_gap = gap.sum(axis=1, keepdims=True)
+            add = np.divide(diff[short, None] * gap, total_gap, out=np.zeros_like(gap), where=total_gap > 0)
+            extra[short] = np.where(gap > 0, np.minimum(extra[short] + add, hi), extra[short])
+        X[:, U:] = extra
+        return X
+
+    def initialize(self, size):
+        X = self.rng.uniform(self.lo, self.hi, size=(size, len(self.lo)))
+        include = self.rng.random((size, len(self.lo) - self.n_user)) < 0.5
+        X[:, self.n_user:] *= include
+        return self.repair(X)
+
+    def fitness(self, X):
+        """fitness() for every row; lower is better."""
+        self.stats["evaluations"] += len(X)
+        U = self.n_user
+        cost = X.sum(axis=1)
+        fit = np.where(cost > self.total_budget, self.penalty_factor * (cost - self.total_budget), 0.0)
+        deviation = np.where(self.has_avg, (X - self.avg) ** 2, 0.0)
+        fit += deviation[:, :U].sum(axis=1)
+        included = X[:, U:] > 0
+        fit += np.where(included, deviation[:, U:] - self.extra_reward, 0.0).sum(axis=1)
+        return fit
+
+    def mutate(self, X):
+        U = self.n_user
+        X = X.copy()
+        span = self.hi - self.lo
+        hit = self.rng.random(X.shape) < self.mutation_rate
+        noisy = np.clip(X + self.rng.normal(0.0, 1.0, X.shape) * self.mutation_scale * span, self.lo, self.hi)
+        fresh = self.rng.uniform(self.lo, self.hi, size=X.shape)
+        drop = self.rng.random(X.shape) < 0.5
+        X[:, :U] = np.where(hit[:, :U], noisy[:, :U], X[:, :U])
+        extra = X[:, U:]
+        X[:, U:] = np.where(
+            hit[:, U:],
+            np.where(extra == 0, fresh[:, U:], np.where(drop[:, U:], noisy[:, U:], 0.0)),
+            extra
+        )
+        return self.repair(X)
+
+    def crossover(self, parents1, parents2):
+        swap = self.rng.random(parents1.shape) < 0.5
+        child1 = np.where(swap, parents1, parents2)
+        child2 = np.where(swap, parents2, parents1)
+        return self.repair(child1), self.repair(child2)
+
+    def tournament(self, fit, n, size=3):
+        """Index of the fittest of `size` distinct random members, for `n` tournaments at once."""
+        entrants = np.argpartition(self.rng.random((n, len(fit))), size - 1, axis=1)[:, :size]
+        return entrants[np.arange(n), fit[entrants].argmin(axis=1)]
+
+    def to_candidate(self, row):
+        U = self.n_user
+        return {
+            "user": {cat: float(v) for cat, v in zip(self.user_cats, row[:U])},
+            "extra": {cat: float(v) for cat, v in zip(self.extra_cats, row[U:])},
+        }
+
+    def run(self, population_size=50, generations=100, top=5):
+        # `fit` always holds the fitness of the current population; rows are only re-scored when they change.
+        population = self.initialize(population_size)
+        fit = self.fitness(population)
+        pairs = (population_size + 1) // 2
+        for gen in range(generations):
+            start = time.perf_counter()
+            repaired = self.repair(population)
+            changed = np.any(repaired != population, axis=1)
+            if changed.any():
+                fit[changed] = self.fitness(repaired[changed])
+            population = repaired
+            parents1 = population[self.tournament(fit, pairs)]
+            parents2 = population[self.tournament(fit, pairs)]
+            child1, child2 = self.crossover(parents1, parents2)
+            children = np.stack([self.mutate(child1), self.mutate(child2)], axis=1)
+            population = children.reshape(-1, population.shape[1])[:population_size]
+            fit = self.fitness(population)
+            self.stats["generation_seconds"].append(time.perf_counter() - start)
+        order = np.argsort(fit, kind='stable')
+        return [self.to_candidate(population[i]) for i in order[:top]]
+
+
+def genetic_algorithm_array(user_cats, extra_cats, avg_prices, min_max, total_budget, population_size=50, generations=100, seed=None, stats=None):
+    """
+    Drop-in for genetic_algorithm: same arguments, returns the 5 fittest
+    {"user": ..., "extra": ...} allocations. Pass a dict as `stats` to get
+    the engine's work counters (see new_stats).
+    """
+    engine = ArrayGA(user_cats, extra_cats, avg_prices, min_max, total_budget, seed=seed)
+    if stats is not None:
+        engine.stats = init_stats(stats)
+    return engine.run(population_size, generations)
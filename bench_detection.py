@@ -0,0 +1,68 @@
+import argparse
+import os
+import time
+import numpy as np
+from ultralytics import YOLO
+
+from modules.config import PATHS, DETECTION
+from modules.utils import detect_objects
+
+parser = argparse.ArgumentParser(description="Latency/recall of the upload detection settings.")
+parser.add_argument('--images', default='uploads', help="Folder of test photos (ideally full-size phone shots)")
+parser.add_argument('--limit', type=int, default=30)
+parser.add_argument('--iou', type=float, default=0.5, help="IoU needed to count a reference box as found")
+args = parser.parse_args()
+
+model = YOLO(PATHS['yolo_model'])
+paths = sorted(os.path.join(args.images, f) for f in os.listdir(args.images)
+               if f.lower().endswith(('.jpg', '.jpeg', '.png')))[:args.limit]
+
+SETTINGS = [
+    ('original (full decode)', lambda p: model.predict(p, conf=DETECTION['conf'], verbose=False)[0]),
+    ('imgsz 320', lambda p: detect_objects(p, model, imgsz=320, tile=False)),
+    ('imgsz 640', lambda p: detect_objects(p, model, imgsz=640, tile=False)),
+    ('imgsz 960', lambda p: detect_objects(p, model, imgsz=960, tile=False)),
+    ('imgsz 1280', lambda p: detect_objects(p, model, imgsz=1280, tile=False)),
+    ('imgsz 640 + tiles', lambda p: detect_objects(p, model, imgsz=640, tile=True)),
+]
+REFERENCE = ('reference: imgsz 1280 + tiles', lambda p: detect_objects(p, model, imgsz=1280, tile=True))
+
+
+def boxes_of(result):
+    return result.boxes.xyxyn.cpu().numpy(), result.boxes.cls.cpu().numpy()
+
+
+def found(reference, candidate):
+    """How many reference boxes have a same-class candidate box with IoU >= args.iou."""
+    (ref_boxes, ref_cls), (boxes, cls) = reference, candidate
+    if len(ref_boxes) == 0 or len(boxes) == 0:
+        return 0
+    x1 = np.maximum(ref_boxes[:, None, 0], boxes[None, :, 0])
+    y1 = np.maximum(ref_boxes[:, None, 1], boxes[None, :, 1])
+    x2 = np.minimum(ref_boxes[:, None, 2], boxes[None, :, 2])
+    y2 = np.minimum(ref_boxes[:, None, 3], boxes[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = lambda b: (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    iou = inter / (area(ref_boxes)[:, None] + area(boxes)[None, :] - inter + 1e-9)
+    match = (iou >= args.iou) & (ref_cls[:, None] == cls[None, :])
+    return int(match.any(axis=1).sum())
+
+
+def run(setting):
+    name, detect = setting
+    detect(paths[0])  # warm-up
+    outputs, start = [], time.perf_counter()
+    for path in paths:
+        outputs.append(boxes_of(detect(path)))
+    return outputs, (time.perf_counter() - start) / len(paths) * 1000
+
+
+print(f"{len(paths)} images from {args.images}")
+reference, ref_ms = run(REFERENCE)
+total = sum(len(boxes) for boxes, _ in reference)
+print(f"{'setting':<28}{'ms/image':>10}{'recall':>9}")
+for setting in SETTINGS:
+    outputs, ms = run(setting)
+    recall = sum(found(r, o) for r, o in zip(reference, outputs)) / max(total, 1)
+    print(f"{setting[0]:<28}{ms:>10.1f}{recall:>9.3f}")
+print(f"{REFERENCE[0]:<28}{ref_ms:>10.1f}{1:>9.3f}  ({total} boxes)")
@@ -0,0 +1,71 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from colorthief import ColorThief
+from PIL import Image
+from scipy.optimize import linear_sum_assignment
+
+from modules.config import PALETTE
+from modules.palette import extract_palette, load_palette_pixels
+
+parser = argparse.ArgumentParser(description="NumPy palette extractors against ColorThief (the original app setting).")
+parser.add_argument('--images', default='Livingroom')
+parser.add_argument('--limit', type=int, default=50)
+parser.add_argument('--colors', type=int, default=PALETTE['num_colors'])
+parser.add_argument('--large', type=int, default=4000, help="Also time JPEG copies upscaled to this width (phone-photo size, where draft decoding applies); 0 to skip")
+parser.add_argument('--large-limit', type=int, default=5, help="Large images to time (ColorThief takes seconds on each)")
+args = parser.parse_args()
+
+paths = sorted(os.path.join(args.images, f) for f in os.listdir(args.images)
+               if f.lower().endswith(('.jpg', '.jpeg', '.png')))[:args.limit]
+
+SETTINGS = [
+    ('median_cut', lambda p: extract_palette(p, args.colors, 'median_cut')),
+    ('kmeans', lambda p: extract_palette(p, args.colors, 'kmeans')),
+]
+REFERENCE = (f"colorthief quality={PALETTE['quality']}",
+             lambda p: ColorThief(p).get_palette(color_count=args.colors, quality=PALETTE['quality']))
+
+
+def distance(reference, palette):
+    """Mean RGB distance between the two palettes after pairing up their colors optimally."""
+    a, b = np.array(reference, dtype=float), np.array(palette, dtype=float)
+    cost = np.linalg.norm(a[:, None] - b[None, :], axis=2)
+    rows, cols = linear_sum_assignment(cost)
+    return cost[rows, cols].mean()
+
+
+def run(setting, paths):
+    name, extract = setting
+    palettes, start = [], time.perf_counter()
+    for path in paths:
+        palettes.append(extract(path))
+    return palettes, (time.perf_counter() - start) / len(paths) * 1000
+
+
+def report(label, paths):
+    sampled = np.mean([len(load_palette_pixels(p)) for p in paths])
+    print(f"\n{len(paths)} {label}, {args.colors} colors, ~{sampled:.0f} pixels sampled per image (target {PALETTE['max_pixels']})")
+    reference, ref_ms = run(REFERENCE, paths)
+    print(f"{'method':<24}{'ms/image':>10}{'speedup':>9}{'RGB dist':>10}")
+    print(f"{REFERENCE[0]:<24}{ref_ms:>10.1f}{1:>9.1f}{0:>10.1f}")
+    for setting in SETTINGS:
+        palettes, ms = run(setting, paths)
+        dist = np.mean([distance(r, p) for r, p in zip(reference, palettes)])
+        print(f"{setting[0]:<24}{ms:>10.1f}{ref_ms / ms:>9.1f}{dist:>10.1f}")
+
+
+report(f"images from {args.images}", paths)
+
+if args.large:
+    with tempfile.TemporaryDirectory() as tmp:
+        large = []
+        for path in paths[:args.large_limit]:
+            with Image.open(path) as img:
+                size = (args.large, round(args.large * img.height / img.width))
+                out = os.path.join(tmp, os.path.splitext(os.path.basename(path))[0] + '.jpg')
+                img.convert('RGB').resize(size, Image.BICUBIC).save(out, quality=90)
+            large.append(out)
+        report(f"JPEGs upscaled to {args.large}px wide", large)
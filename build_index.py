@@ -0,0 +1,43 @@
+import argparse
+import time
+import numpy as np
+
+from modules.config import PATHS, INDEX
+from modules.index import build_index, save_index, FlatIndex
+from modules.store import load_embeddings
+
+parser = argparse.ArgumentParser(description="Build the similar-room search index offline.")
+parser.add_argument('--kind', choices=['flat', 'ivf', 'pq'], default=INDEX['kind'])
+parser.add_argument('--nlist', type=int, default=INDEX['ivf']['nlist'], help="IVF clusters (default 4*sqrt(N))")
+parser.add_argument('--nprobe', type=int, default=INDEX['ivf']['nprobe'], help="IVF clusters scanned per query")
+parser.add_argument('--m', type=int, default=INDEX['pq']['m'], help="PQ sub-quantizers (bytes per room)")
+parser.add_argument('--opq', action='store_true', default=INDEX['pq']['opq'], help="Learn an OPQ rotation first")
+parser.add_argument('--rerank', type=int, default=INDEX['pq']['rerank'], help="PQ shortlist re-scored exactly (0 = off)")
+parser.add_argument('--queries', type=int, default=200, help="Corpus vectors used to measure recall@5")
+args = parser.parse_args()
+
+feature_list, _ = load_embeddings()
+print(f"Loaded {feature_list.shape[0]} embeddings of dim {feature_list.shape[1]} ({feature_list.dtype})")
+
+params = {
+    'flat': {},
+    'ivf': {'nlist': args.nlist, 'nprobe': args.nprobe},
+    'pq': {'m': args.m, 'opq': args.opq, 'rerank': args.rerank},
+}[args.kind]
+start = time.perf_counter()
+index = build_index(feature_list, args.kind, **params)
+save_index(index, PATHS['index'])
+print(f"Built {args.kind} index in {time.perf_counter() - start:.2f}s -> {PATHS['index']}")
+
+if args.kind == 'pq':
+    full = feature_list.shape[1] * feature_list.dtype.itemsize
+    print(f"memory per vector: {index.bytes_per_vector} B codes vs {full} B stored ({full / index.bytes_per_vector:.0f}x)")
+
+# Compare against exact search using corpus vectors as queries.
+queries = np.asarray(feature_list[:min(args.queries, len(feature_list))], dtype=np.float32)
+exact, _ = FlatIndex(feature_list).search(queries, k=5)
+start = time.perf_counter()
+found, _ = index.search(queries, k=5)
+elapsed = (time.perf_counter() - start) / len(queries) * 1000
+recall = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(exact, found)])
+print(f"recall@5 vs exact: {recall:.3f} | {elapsed:.2f} ms/query")
\ No newline at end of file
@@ -0,0 +1,22 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from tqdm import tqdm
+
+from modules.config import THUMBNAILS
+from modules.thumbnails import make_thumbnails, is_fresh
+
+parser = argparse.ArgumentParser(description="Generate the thumbnail pyramid for the room corpus.")
+parser.add_argument('--images', default='Livingroom', help="Folder of room images")
+parser.add_argument('--workers', type=int, default=os.cpu_count())
+parser.add_argument('--force', action='store_true', help="Regenerate thumbnails that are already up to date")
+args = parser.parse_args()
+
+images = sorted(os.path.join(args.images, file) for file in os.listdir(args.images))
+todo = images if args.force else [path for path in images if not is_fresh(path)]
+print(f"🔄 {len(todo)} of {len(images)} images need thumbnails {THUMBNAILS['sizes']}.")
+
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    list(tqdm(pool.map(make_thumbnails, todo), total=len(todo)))
+print(f"✅ Thumbnails written to {THUMBNAILS['dir']}")
\ No newline at end of file
@@ -0,0 +1,43 @@
+import argparse
+import os
+import time
+import numpy as np
+
+from modules.config import PATHS, DETECTION
+from modules.runtime import load_yolo_model
+from modules.utils import detect_objects
+
+parser = argparse.ArgumentParser(description="mAP and CPU latency of the PyTorch detector against its quantized export.")
+parser.add_argument('--data', required=True, help="Dataset YAML of a held-out labelled sample")
+parser.add_argument('--split', default='val')
+parser.add_argument('--images', default='uploads', help="Folder of photos for the end-to-end latency run")
+parser.add_argument('--limit', type=int, default=50)
+parser.add_argument('--imgsz', type=int, default=DETECTION['imgsz'])
+parser.add_argument('--models', nargs='+', default=[PATHS['yolo_model'], PATHS['yolo_openvino']])
+args = parser.parse_args()
+
+paths = sorted(os.path.join(args.images, f) for f in os.listdir(args.images)
+               if f.lower().endswith(('.jpg', '.jpeg', '.png')))[:args.limit]
+
+
+def latency(model):
+    # Same path as an upload: draft decode + predict (+ tiles if enabled).
+    times = []
+    for path in paths:
+        start = time.perf_counter()
+        detect_objects(path, model, imgsz=args.imgsz)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.mean(times), np.percentile(times, 95)
+
+
+print(f"mAP on {args.data} [{args.split}], latency over {len(paths)} images from {args.images}")
+print(f"{'model':<40}{'mAP50':>8}{'mAP50-95':>10}{'ms/img':>9}{'p95 ms':>9}")
+for path in args.models:
+    if not os.path.exists(path):
+        print(f"{path:<40}  (missing, skipped)")
+        continue
+    model = load_yolo_model(path, args.imgsz)
+    metrics = model.val(data=args.data, split=args.split, imgsz=args.imgsz, batch=1, device='cpu',
+                        plots=False, verbose=False)
+    mean_ms, p95_ms = latency(model) if paths else (float('nan'), float('nan'))
+    print(f"{os.path.basename(path):<40}{metrics.box.map50:>8.3f}{metrics.box.map:>10.3f}{mean_ms:>9.1f}{p95_ms:>9.1f}")
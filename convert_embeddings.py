@@ -0,0 +1,31 @@
+import argparse
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from modules.config import PATHS, EMBEDDING_MODEL
+from modules.store import write_store, read_manifest, write_manifest, hash_file
+
+parser = argparse.ArgumentParser(description="Convert embeddings.pkl/filenames.pkl into the memory-mapped store.")
+parser.add_argument('--embeddings', default=PATHS['embeddings'])
+parser.add_argument('--filenames', default=PATHS['filenames'])
+parser.add_argument('--float16', action='store_true', help="Store vectors as float16 (half the size)")
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Hashing threads")
+args = parser.parse_args()
+
+feature_list = np.array(pickle.load(open(args.embeddings, 'rb')), dtype=np.float32)
+filenames = pickle.load(open(args.filenames, 'rb'))
+generation = read_manifest()['generation'] + 1
+meta = write_store(feature_list, filenames, dtype='float16' if args.float16 else 'float32', generation=generation)
+print(f"Wrote {meta['count']} x {meta['dim']} {meta['dtype']} embeddings -> {PATHS['store']}")
+
+# The manifest lets update_embeddings.py skip these images instead of re-embedding the corpus.
+# Keys use forward slashes like update_embeddings.py; images missing here are left out and get re-embedded.
+paths = [f.replace('\\', '/') for f in filenames]
+present = [p for p in paths if os.path.exists(p)]
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    hashes = list(pool.map(hash_file, present))
+write_manifest(generation, {p: {'sha1': h, 'model': EMBEDDING_MODEL} for p, h in zip(present, hashes)})
+print(f"Wrote manifest for {len(present)} images -> {PATHS['manifest']}"
+      + (f" ({len(paths) - len(present)} not found, will be re-embedded)" if len(present) < len(paths) else ""))
@@ -1,39 +1,69 @@
-import tensorflow
-from tensorflow.keras.preprocessing import image
-from tensorflow.keras.layers import GlobalMaxPooling2D
-from tensorflow.keras.applications.resnet50 import ResNet50,preprocess_input
-import numpy as np
-from numpy.linalg import norm
+import argparse
+import json
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 from tqdm import tqdm
-import pickle
 
-model = ResNet50(weights='imagenet',include_top=False,input_shape=(224,224,3))
-model.trainable = False
+from modules.config import PATHS, EMBEDDING_MODEL
+from modules.models import load_resnet
+from modules.store import write_store, read_manifest, write_manifest, hash_file
+from modules.utils import batch_feature_extraction
 
-model = tensorflow.keras.Sequential([
-    model,
-    GlobalMaxPooling2D()
-])
+parser = argparse.ArgumentParser(description="Build the room embedding store from an image folder.")
+parser.add_argument('--images', default='Livingroom', help="Folder of room images")
+parser.add_argument('--batch-size', type=int, default=64, help="Images per ResNet forward pass")
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Decode/preprocess threads")
+parser.add_argument('--chunk', type=int, default=1024, help="Images per checkpoint file")
+parser.add_argument('--checkpoint-dir', default=os.path.join(os.path.dirname(PATHS['store']), 'embeddings.ckpt'))
+parser.add_argument('--float16', action='store_true', help="Store vectors as float16")
+args = parser.parse_args()
 
-def extract_features(img_path,model):
-    img = image.load_img(img_path,target_size=(224,224))
-    img_array = image.img_to_array(img)
-    expanded_img_array = np.expand_dims(img_array, axis=0)
-    preprocessed_img = preprocess_input(expanded_img_array)
-    result = model.predict(preprocessed_img).flatten()
-    normalized_result = result / norm(result)
 
-    return normalized_result
+def load_progress(progress_path, filenames):
+    if os.path.exists(progress_path):
+        with open(progress_path) as f:
+            progress = json.load(f)
+        if progress['filenames'] == filenames and progress['chunk'] == args.chunk:
+            return progress
+        print("⚠️ Image folder or chunk size changed since the last run, starting over.")
+    return {'filenames': filenames, 'chunk': args.chunk, 'done': []}
 
-filenames = []
-for file in os.listdir('Livingroom'):
-    filenames.append(os.path.join('Livingroom',file))
 
-feature_list = []
+def save_progress(progress_path, progress):
+    tmp_path = progress_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, progress_path)
 
-for file in tqdm(filenames):
-    feature_list.append(extract_features(file,model))
 
-pickle.dump(feature_list,open('embeddings.pkl','wb'))
-pickle.dump(filenames,open('filenames.pkl','wb'))
\ No newline at end of file
+filenames = sorted(os.path.join(args.images, file) for file in os.listdir(args.images))
+os.makedirs(args.checkpoint_dir, exist_ok=True)
+progress_path = os.path.join(args.checkpoint_dir, 'progress.json')
+progress = load_progress(progress_path, filenames)
+
+chunks = [filenames[i:i + args.chunk] for i in range(0, len(filenames), args.chunk)]
+todo = [c for c in range(len(chunks)) if c not in progress['done']]
+print(f"🔄 {len(filenames)} images, {len(chunks) - len(todo)}/{len(chunks)} chunks already embedded.")
+
+if todo:
+    model = load_resnet()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for c in tqdm(todo, unit='chunk'):
+            part_path = os.path.join(args.checkpoint_dir, f"part-{c:05d}.npy")
+            np.save(part_path, batch_feature_extraction(chunks[c], model, pool, args.batch_size))
+            progress['done'].append(c)
+            save_progress(progress_path, progress)
+
+feature_list = np.concatenate([
+    np.load(os.path.join(args.checkpoint_dir, f"part-{c:05d}.npy")) for c in range(len(chunks))
+])
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    hashes = list(pool.map(hash_file, filenames))
+generation = read_manifest()['generation'] + 1
+meta = write_store(feature_list, filenames, dtype='float16' if args.float16 else 'float32', generation=generation)
+write_manifest(generation, {f: {'sha1': h, 'model': EMBEDDING_MODEL} for f, h in zip(filenames, hashes)})
+shutil.rmtree(args.checkpoint_dir)
+print(f"✅ Wrote {meta['count']} x {meta['dim']} {meta['dtype']} embeddings -> {PATHS['store']}")
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from tqdm import tqdm
+
+from modules.config import PATHS, DETECTION
+from modules.corpus_detections import write_detections
+
+_model = None
+
+
+def init_worker(model_path, threads):
+    # One detector per process; split the cores between processes instead of oversubscribing.
+    global _model
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(threads)
+    _model = YOLO(model_path)
+
+
+def detect_chunk(chunk_id, paths, batch_size, conf, out_path):
+    sizes, counts, class_ids, confidences, boxes = [], [], [], [], []
+    for start in range(0, len(paths), batch_size):
+        for result in _model.predict(paths[start:start + batch_size], conf=conf, verbose=False):
+            height, width = result.orig_shape
+            sizes.append((width, height))
+            counts.append(len(result.boxes))
+            class_ids.append(result.boxes.cls.cpu().numpy().astype(np.int16))
+            confidences.append(result.boxes.conf.cpu().numpy())
+            boxes.append(result.boxes.xyxyn.cpu().numpy().reshape(-1, 4))
+    np.savez(
+        out_path,
+        sizes=np.array(sizes, dtype=np.int32),
+        counts=np.array(counts, dtype=np.int64),
+        class_ids=np.concatenate(class_ids),
+        confidences=np.concatenate(confidences),
+        boxes=np.concatenate(boxes),
+    )
+    return chunk_id, _model.names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the YOLO furniture detector over the room corpus.")
+    parser.add_argument('--images', default='Livingroom', help="Folder of room images")
+    parser.add_argument('--model', default=PATHS['yolo_model'])
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Detector processes")
+    parser.add_argument('--batch-size', type=int, default=16, help="Images per YOLO call")
+    parser.add_argument('--chunk', type=int, default=256, help="Images per checkpoint file")
+    parser.add_argument('--conf', type=float, default=DETECTION['conf'])
+    parser.add_argument('--checkpoint-dir', default=os.path.join(os.path.dirname(PATHS['detections']), 'detections.ckpt'))
+    parser.add_argument('--csv', action='store_true', help="Also regenerate detected_objects.csv for older readers")
+    args = parser.parse_args()
+
+    images = sorted(os.listdir(args.images))
+    paths = [os.path.join(args.images, image) for image in images]
+    chunks = [paths[i:i + args.chunk] for i in range(0, len(paths), args.chunk)]
+
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    progress_path = os.path.join(args.checkpoint_dir, 'progress.json')
+    progress = {'images': images, 'chunk': args.chunk, 'done': [], 'names': None}
+    if os.path.exists(progress_path):
+        with open(progress_path) as f:
+            saved = json.load(f)
+        if saved['images'] == images and saved['chunk'] == args.chunk:
+            progress = saved
+    todo = [c for c in range(len(chunks)) if c not in progress['done']]
+    print(f"🔄 {len(images)} images, {len(chunks) - len(todo)}/{len(chunks)} chunks already detected.")
+
+    if todo:
+        threads = max(1, (os.cpu_count() or 1) // args.workers)
+        with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(args.model, threads)) as pool:
+            futures = [
+                pool.submit(detect_chunk, c, chunks[c], args.batch_size, args.conf,
+                            os.path.join(args.checkpoint_dir, f"part-{c:05d}.npz"))
+                for c in todo
+            ]
+            for future in tqdm(as_completed(futures), total=len(futures), unit='chunk'):
+                chunk_id, names = future.result()
+                progress['done'].append(chunk_id)
+                progress['names'] = [names[i] for i in sorted(names)]
+                tmp_path = progress_path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(progress, f)
+                os.replace(tmp_path, progress_path)
+
+    parts = [np.load(os.path.join(args.checkpoint_dir, f"part-{c:05d}.npz")) for c in range(len(chunks))]
+    columns = {key: np.concatenate([part[key] for part in parts]) for key in ('sizes', 'counts', 'class_ids', 'confidences', 'boxes')}
+    write_detections(images, columns['sizes'], columns['counts'], columns['class_ids'], columns['confidences'],
+                     columns['boxes'], progress['names'])
+    print(f"✅ {len(columns['class_ids'])} detections over {len(images)} images -> {PATHS['detections']}")
+
+    if args.csv:
+        import pandas as pd
+        from modules.corpus_detections import objects_by_image
+
+        objects = objects_by_image()
+        pd.DataFrame({'image': images, 'detected_objects': [str(objects.get(i, set())) for i in images]}).to_csv(PATHS['objects_csv'], index=False)
+        print(f"✅ Regenerated {PATHS['objects_csv']}")
+
+    shutil.rmtree(args.checkpoint_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import sys
+import numpy as np
+
+from modules.config import PATHS
+from modules.runtime import OnnxFeatureExtractor, build_keras_resnet
+from modules.store import load_embeddings
+from modules.utils import batch_feature_extraction
+
+parser = argparse.ArgumentParser(description="Export the ResNet feature extractor to ONNX and check it against the stored Keras embeddings.")
+parser.add_argument('--output', default=PATHS['resnet_onnx'])
+parser.add_argument('--opset', type=int, default=17)
+parser.add_argument('--check', type=int, default=64, help="Corpus images compared against the stored embeddings")
+parser.add_argument('--check-only', action='store_true', help="Skip the export and only run the parity check")
+parser.add_argument('--min-cosine', type=float, default=0.999, help="Fail if any ONNX embedding is less similar than this")
+args = parser.parse_args()
+
+if not args.check_only:
+    import tensorflow as tf
+    import tf2onnx
+
+    model = build_keras_resnet()
+
+    @tf.function(input_signature=[tf.TensorSpec((None, 224, 224, 3), tf.float32, name='input')])
+    def serve(x):
+        return model(x, training=False)
+
+    tf2onnx.convert.from_function(serve, input_signature=serve.input_signature, opset=args.opset, output_path=args.output)
+    print(f"✅ Exported ResNet50 + GlobalMaxPooling2D -> {args.output}")
+
+# Parity: the ONNX model must reproduce the Keras embeddings the index was built from.
+vectors, filenames = load_embeddings()
+rng = np.random.default_rng(0)
+rows = np.sort(rng.choice(len(filenames), min(args.check, len(filenames)), replace=False))
+paths = [filenames[i].replace('\\', '/') for i in rows]
+
+onnx_features = batch_feature_extraction(paths, OnnxFeatureExtractor(args.output), batch_size=16)
+cosine = np.sum(onnx_features * np.asarray(vectors[rows], dtype=np.float32), axis=1)
+print(f"🔎 cosine(ONNX, stored Keras) over {len(rows)} images: min {cosine.min():.6f}, mean {cosine.mean():.6f}")
+
+if cosine.min() < args.min_cosine:
+    print(f"❌ Parity check failed: {np.sum(cosine < args.min_cosine)} embeddings below {args.min_cosine}")
+    sys.exit(1)
+print("✅ Parity check passed.")
@@ -0,0 +1,33 @@
+import argparse
+import os
+import shutil
+from ultralytics import YOLO
+
+from modules.config import PATHS, DETECTION
+
+parser = argparse.ArgumentParser(description="Export the furniture detector to a quantized OpenVINO model for CPU serving.")
+parser.add_argument('--precision', choices=['int8', 'fp16'], default='int8')
+parser.add_argument('--data', help="Dataset YAML; its images calibrate the int8 quantization (required for int8)")
+parser.add_argument('--imgsz', type=int, default=DETECTION['imgsz'])
+parser.add_argument('--static', action='store_true', help="Fix the input shape to --imgsz (slightly faster, but no other sizes or tiles)")
+parser.add_argument('--output', default=PATHS['yolo_openvino'])
+args = parser.parse_args()
+
+if args.precision == 'int8' and not args.data:
+    parser.error("--data is required for int8 calibration")
+
+model = YOLO(PATHS['yolo_model'])
+exported = model.export(
+    format='openvino',
+    imgsz=args.imgsz,
+    int8=args.precision == 'int8',
+    half=args.precision == 'fp16',
+    dynamic=not args.static,
+    data=args.data,
+)
+
+if os.path.abspath(exported) != os.path.abspath(args.output):
+    shutil.rmtree(args.output, ignore_errors=True)
+    shutil.move(exported, args.output)
+print(f"✅ Exported {args.precision} detector -> {args.output}")
+print("   Compare it with the PyTorch model: python compare_yolo.py --data <held-out dataset YAML>")
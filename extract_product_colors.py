@@ -0,0 +1,111 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit
+
+from tqdm import tqdm
+
+from modules.config import PRODUCT_IMAGES, CATALOG
+from modules.catalog_writer import open_catalog, CATALOG_BACKENDS
+from modules.color_util import categorize_color_family
+from modules.palette import extract_palette, to_hex
+from modules.product_images import ImageCache, RateLimiter, http_session
+
+
+def palette_of(path, num_colors):
+    # Runs in a worker process.
+    return [to_hex(color) for color in extract_palette(path, num_colors)]
+
+
+def mirrored(url, mirror):
+    """Point `url` at another host (e.g. a local http.server holding copies of the images)."""
+    if not mirror:
+        return url
+    base = urlsplit(mirror)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, base.path.rstrip('/') + parts.path, parts.query, ''))
+
+
+def fetch(url, session, limiter, cache, timeout):
+    path = cache.get(url)
+    if path:
+        return path, True
+    limiter.wait()
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return cache.put(url, response.content), False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download product images (cached) and store their dominant colors (and, with --write-family, color family).")
+    parser.add_argument('--source', choices=sorted(CATALOG_BACKENDS), default=CATALOG['backend'], help="Catalog the product ids and image URLs come from")
+    parser.add_argument('--write', nargs='+', choices=sorted(CATALOG_BACKENDS), default=[CATALOG['backend']], help="Catalogs to update")
+    parser.add_argument('--mirror', help="Fetch from this base URL instead of the original hosts (testing)")
+    parser.add_argument('--workers', type=int, default=PRODUCT_IMAGES['workers'], help="Download threads")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2, help="Palette worker processes")
+    parser.add_argument('--rate', type=float, default=PRODUCT_IMAGES['rate'], help="Max new downloads per second (0 = unlimited)")
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--write-family', action='store_true', help="Also overwrite the curated `color` family with the family of color1")
+    args = parser.parse_args()
+
+    source = open_catalog(args.source)
+    products = source.read(['id', 'image_url'])
+    source.close()
+    products = products[products['image_url'].astype(str).str.startswith('http')]
+    if args.limit:
+        products = products.head(args.limit)
+    print(f"✅ Found {len(products)} products with image URLs.")
+
+    cache = ImageCache()
+    session = http_session(args.workers)
+    limiter = RateLimiter(args.rate)
+    num_colors = PRODUCT_IMAGES['num_colors']
+    colors, failed, hits = {}, 0, 0
+    start = time.perf_counter()
+
+    # Downloads finish in any order; each image goes to the palette processes as soon as it is on disk.
+    with ThreadPoolExecutor(args.workers) as threads, ProcessPoolExecutor(args.processes) as processes:
+        downloads = {
+            threads.submit(fetch, mirrored(url, args.mirror), session, limiter, cache, PRODUCT_IMAGES['timeout']): prod_id
+            for prod_id, url in zip(products['id'], products['image_url'])
+        }
+        palettes = {}
+        for future in tqdm(as_completed(downloads), total=len(downloads), desc="Downloading"):
+            prod_id = downloads[future]
+            try:
+                path, cached = future.result()
+                hits += cached
+                palettes[processes.submit(palette_of, path, num_colors)] = prod_id
+            except Exception as e:
+                failed += 1
+                print(f"❌ Product {prod_id}: {e}")
+        for future in tqdm(as_completed(palettes), total=len(palettes), desc="Palettes"):
+            prod_id = palettes[future]
+            try:
+                hex_colors = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ Product {prod_id}: {e}")
+                continue
+            if len(hex_colors) < num_colors:
+                hex_colors += [hex_colors[-1] if hex_colors else None] * (num_colors - len(hex_colors))
+            colors[prod_id] = tuple(hex_colors[:3])
+            if args.write_family:
+                colors[prod_id] += (categorize_color_family(hex_colors[0]) if hex_colors[0] else None,)
+    cache.save()
+
+    print(f"🎨 {len(colors)} products colored ({hits} images from cache, {failed} failed) in {time.perf_counter() - start:.1f}s")
+    rows = [(*values, int(prod_id)) for prod_id, values in colors.items()]
+    columns = ['color1', 'color2', 'color3'] + (['color'] if args.write_family else [])
+    for backend in args.write:
+        catalog = open_catalog(backend)
+        try:
+            written = catalog.update(rows, columns)
+            print(f"💾 Updated {written} products in the {backend} catalog")
+        finally:
+            catalog.close()
+
+
+if __name__ == '__main__':
+    main()
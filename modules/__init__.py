@@ -1,9 +1,11 @@
 from .config import PATHS
-from .models import load_yolo, load_resnet, load_features
+from .models import load_yolo, load_resnet, load_features, load_index
 from .utils import (
     save_uploaded_file,
     feature_extraction,
+    batch_feature_extraction,
     recommend,
+    batch_recommend,
     detect_objects,
     get_recommended_objects
 )
@@ -14,9 +16,12 @@ __all__ = [
     'load_yolo',
     'load_resnet',
     'load_features',
+    'load_index',
     'save_uploaded_file',
     'feature_extraction',
+    'batch_feature_extraction',
     'recommend',
+    'batch_recommend',
     'detect_objects',
     'get_recommended_objects',
     'inject_css',
@@ -0,0 +1,97 @@
+import collections
+import contextlib
+import threading
+import time
+
+from .config import ADMISSION
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class AdmissionTimeout(TimeoutError):
+    pass
+
+
+class AdmissionGate:
+    """
+    Lets at most `concurrency` jobs of one kind run at once, in arrival
+    order. Up to `max_queue` more wait in line (for at most `timeout`
+    seconds each); beyond that, new jobs are refused with QueueFull
+    instead of piling up. The timeout covers the wait in line only:
+    once admitted, a job is not interrupted.
+    """
+
+    def __init__(self, name, concurrency, max_queue, timeout):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = collections.deque()
+
+    def position(self, label):
+        """1-based place in line of the first waiting job tagged `label`, or 0 if none is waiting."""
+        with self._cond:
+            for i, entry in enumerate(self._waiting):
+                if entry[0] == label:
+                    return i + 1
+        return 0
+
+    def status(self):
+        with self._cond:
+            return self._running, len(self._waiting)
+
+    @contextlib.contextmanager
+    def admit(self, label=None, on_wait=None, timeout=None):
+        """
+        Hold a slot for the duration of the block. `on_wait(position)` is
+        called (outside the lock) about twice a second while in line.
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        entry = [label]
+        with self._cond:
+            if self._running < self.concurrency and not self._waiting:
+                self._running += 1
+                entry = None
+            elif len(self._waiting) >= self.max_queue:
+                raise QueueFull(f"{self.name}: server busy ({len(self._waiting)} requests waiting), please try again shortly")
+            else:
+                self._waiting.append(entry)
+        try:
+            while entry is not None:
+                with self._cond:
+                    if self._waiting[0] is entry and self._running < self.concurrency:
+                        self._waiting.popleft()
+                        self._running += 1
+                        entry = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionTimeout(f"{self.name}: timed out after {self.timeout:.0f}s in line")
+                    self._cond.wait(min(remaining, 0.5))
+                    position = self._waiting.index(entry) + 1
+                if on_wait:
+                    on_wait(position)
+        except BaseException:
+            if entry is not None:
+                with self._cond:
+                    self._waiting.remove(entry)
+                    self._cond.notify_all()
+            raise
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def run(self, fn, *args, label=None, on_wait=None, **kwargs):
+        with self.admit(label, on_wait):
+            return fn(*args, **kwargs)
+
+
+# One gate per kind of heavy job, shared by every session and thread in the process.
+GATES = {name: AdmissionGate(name, **settings) for name, settings in ADMISSION.items()}
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+from .config import ANALYSIS_CACHE, DETECTION, EMBEDDING_MODEL, PALETTE, YOLO_RUNTIME
+from .runtime import yolo_model_path, model_version
+
+
+def analysis_versions():
+    """Everything besides the image bytes that changes an analysis result."""
+    path = yolo_model_path(YOLO_RUNTIME)
+    yolo = f"{os.path.basename(path)}:{model_version(path)}"
+    return {'yolo': yolo, 'detection': DETECTION, 'embedding': EMBEDDING_MODEL, 'palette': PALETTE}
+
+
+class AnalysisCache:
+    """
+    Disk-backed, size-bounded LRU cache of per-upload results. One entry per
+    (image content, model/parameter versions) holds the detections, the
+    embedding and the palette together; file mtimes track recency.
+    """
+
+    def __init__(self, root=ANALYSIS_CACHE['dir'], max_bytes=ANALYSIS_CACHE['max_bytes']):
+        self.root = root
+        self.max_bytes = max_bytes
+        # Stages of one upload finish concurrently; serialize read-merge-write of an entry.
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, image_bytes, versions=None):
+        versions = analysis_versions() if versions is None else versions
+        content = hashlib.sha256(image_bytes).hexdigest()
+        params = hashlib.sha1(json.dumps(versions, sort_keys=True).encode()).hexdigest()[:12]
+        return f"{content}-{params}"
+
+    def _path(self, key):
+        return os.path.join(self.root, key + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+
+    def update(self, key, **fields):
+        with self._lock:
+            entry = self.get(key)
+            entry.update(fields)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict()
+        return entry
+
+    def get_or_compute(self, key, field, compute):
+        entry = self.get(key)
+        if field in entry:
+            return entry[field]
+        value = compute()
+        self.update(key, **{field: value})
+        return value
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+                total -= size
+            except OSError:
+                pass
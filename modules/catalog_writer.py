@@ -0,0 +1,136 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+from .config import CATALOG, DATABASE, PATHS
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class SQLCatalog:
+    """
+    Products table behind a DB-API connection. `update` adds any missing
+    columns (like CSVCatalog), then writes with executemany, `chunk_size`
+    rows per call, each chunk in its own transaction: a failure rolls back
+    that chunk only and is re-raised.
+    """
+
+    placeholder = '%s'
+    column_type = 'TEXT'
+
+    def __init__(self, connection, chunk_size=CATALOG['chunk_size']):
+        self.connection = connection
+        self.chunk_size = chunk_size
+
+    def read(self, columns):
+        cursor = self.connection.cursor()
+        cursor.execute(f"SELECT {', '.join(columns)} FROM products")
+        rows = cursor.fetchall()
+        cursor.close()
+        return pd.DataFrame(rows, columns=columns)
+
+    def _add_columns(self, cursor, columns):
+        cursor.execute("SELECT * FROM products LIMIT 0")
+        existing = {d[0] for d in cursor.description}
+        cursor.fetchall()
+        for column in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE products ADD COLUMN {column} {self.column_type}")
+        self.connection.commit()
+
+    def update(self, rows, columns, key='id'):
+        """rows: sequence of tuples (*values for `columns`, key value). Returns the number of products matched."""
+        rows = list(rows)
+        sql = (f"UPDATE products SET {', '.join(f'{c}={self.placeholder}' for c in columns)} "
+               f"WHERE {key}={self.placeholder}")
+        cursor = self.connection.cursor()
+        matched = 0
+        try:
+            self._add_columns(cursor, columns)
+            for chunk in _chunks(rows, self.chunk_size):
+                try:
+                    cursor.executemany(sql, chunk)
+                    self.connection.commit()
+                except Exception:
+                    self.connection.rollback()
+                    raise
+                matched += max(cursor.rowcount, 0)
+        finally:
+            cursor.close()
+        return matched
+
+    def close(self):
+        self.connection.close()
+
+
+class MySQLCatalog(SQLCatalog):
+    column_type = 'VARCHAR(32)'
+
+    def __init__(self, chunk_size=CATALOG['chunk_size'], **settings):
+        import mysql.connector
+        from mysql.connector.constants import ClientFlag
+
+        # FOUND_ROWS: rowcount counts matched rows, not only the ones whose values changed.
+        settings.setdefault('client_flags', [ClientFlag.FOUND_ROWS])
+        super().__init__(mysql.connector.connect(**{**DATABASE, **settings}), chunk_size)
+
+
+class SQLiteCatalog(SQLCatalog):
+    """
+    Serverless SQL backend for testing. A new database file is filled from
+    products.csv on first open, so it starts with the same rows as CSVCatalog.
+    """
+
+    placeholder = '?'
+
+    def __init__(self, path=CATALOG['sqlite'], chunk_size=CATALOG['chunk_size'], csv_path=PATHS['products_csv']):
+        super().__init__(sqlite3.connect(path), chunk_size)
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products'"
+        ).fetchone()
+        if not exists:
+            pd.read_csv(csv_path).to_sql('products', self.connection, index=False)
+
+
+class CSVCatalog:
+    """products.csv as a backend: updates are applied as one column-wise merge and written atomically."""
+
+    def __init__(self, path=PATHS['products_csv'], chunk_size=None):
+        self.path = path
+
+    def read(self, columns):
+        df = pd.read_csv(self.path)
+        return df[[c for c in columns if c in df.columns]]
+
+    def update(self, rows, columns, key='id'):
+        rows = list(rows)
+        if not rows:
+            return 0
+        updates = pd.DataFrame(rows, columns=[*columns, key]).drop_duplicates(key, keep='last').set_index(key)
+        df = pd.read_csv(self.path)
+        for column in columns:
+            if column not in df.columns:
+                df[column] = None
+        matched = df[key].isin(updates.index)
+        for column in columns:
+            df.loc[matched, column] = df.loc[matched, key].map(updates[column]).values
+        tmp_path = self.path + '.tmp'
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        return int(matched.sum())
+
+    def close(self):
+        pass
+
+
+CATALOG_BACKENDS = {'mysql': MySQLCatalog, 'sqlite': SQLiteCatalog, 'csv': CSVCatalog}
+
+
+def open_catalog(backend=CATALOG['backend'], **kwargs):
+    if backend not in CATALOG_BACKENDS:
+        raise ValueError(f"Unknown catalog backend: {backend}")
+    return CATALOG_BACKENDS[backend](**kwargs)
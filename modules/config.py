@@ -6,6 +6,144 @@ ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
 PATHS = {
     'embeddings': os.path.join(ASSETS_DIR, 'embeddings.pkl'),
     'filenames': os.path.join(ASSETS_DIR, 'filenames.pkl'),
+    'store': os.path.join(ASSETS_DIR, 'embeddings.npy'),
+    'store_meta': os.path.join(ASSETS_DIR, 'embeddings.json'),
+    'manifest': os.path.join(ASSETS_DIR, 'manifest.json'),
+    'index': os.path.join(ASSETS_DIR, 'index.npz'),
+    'resnet_onnx': os.path.join(ASSETS_DIR, 'resnet50_gmp.onnx'),
     'yolo_model': os.path.join(ASSETS_DIR, 'best.pt'),
-    'objects_csv': os.path.join(ASSETS_DIR, 'detected_objects.csv')
+    'yolo_openvino': os.path.join(ASSETS_DIR, 'best_openvino_model'),
+    'objects_csv': os.path.join(ASSETS_DIR, 'detected_objects.csv'),
+    'detections': os.path.join(ASSETS_DIR, 'detections.npz'),
+    'object_bitmaps': os.path.join(ASSETS_DIR, 'object_bitmaps.npz'),
+    'color_family_lut': os.path.join(ASSETS_DIR, 'color_family_lut.npz'),
+    'products_csv': os.path.join(BASE_DIR, 'products.csv')
+}
+
+# Inspiration images are shown from a pre-built pyramid (longest side in px).
+THUMBNAILS = {
+    'dir': os.path.join(ASSETS_DIR, 'thumbnails'),
+    'sizes': (160, 320, 640),
+    'display': 320,
+    'quality': 80,
+}
+
+# Upload detection. Photos are decoded (JPEG draft mode) with the longest side
+# at `imgsz`; with `tile`, photos are decoded at up to `tile_decode` px and
+# also scanned as overlapping `tile_size` crops merged by cross-tile NMS.
+DETECTION = {
+    'conf': 0.3,
+    'imgsz': int(os.environ.get('ROOMSCAPES_DETECT_IMGSZ', 640)),
+    'draft': True,
+    'tile': os.environ.get('ROOMSCAPES_DETECT_TILE', '0') == '1',
+    'tile_size': 640,
+    'tile_overlap': 0.2,
+    'tile_decode': 1920,
+    'iou': 0.5,
+    # Longest side of the annotated preview, drawn on demand from the stored boxes.
+    'render_side': 1280,
+}
+
+# Room palette: 'median_cut' / 'kmeans' run in NumPy on a ~`max_pixels`
+# downsample (see modules/palette.py); 'colorthief' is the original
+# pure-Python MMCQ over every `quality`-th pixel.
+PALETTE = {
+    'method': os.environ.get('ROOMSCAPES_PALETTE', 'median_cut'),
+    'num_colors': 4,
+    'quality': 1,
+    'max_pixels': 20000,
+}
+
+# Threads shared by all sessions for the per-upload detection/palette/embedding
+# stages. Model stages mostly wait at the ADMISSION gates below, so this is
+# sized to let queued uploads reach a gate (and see their place in line).
+PIPELINE = {
+    'workers': int(os.environ.get('ROOMSCAPES_PIPELINE_WORKERS', 32)),
+}
+
+# Concurrent YOLO/ResNet requests from all sessions are run as one batch when
+# they arrive within `max_wait_ms` of each other (see modules/inference.py).
+INFERENCE = {
+    'max_batch': int(os.environ.get('ROOMSCAPES_INFER_BATCH', 8)),
+    'max_wait_ms': float(os.environ.get('ROOMSCAPES_INFER_WAIT_MS', 10)),
+}
+
+# Admission control for the heavy jobs: at most `concurrency` run at once per
+# process, up to `max_queue` more wait in line and any beyond that are turned
+# away with a "server busy" message. `timeout` bounds the wait in line only;
+# a job that has been admitted runs to completion.
+# The detection and embedding gates sit in front of the micro-batcher, so
+# their concurrency must be at least INFERENCE['max_batch'] or batches can
+# never fill.
+ADMISSION = {
+    'detection': {
+        'concurrency': int(os.environ.get('ROOMSCAPES_DETECT_CONCURRENCY', INFERENCE['max_batch'])),
+        'max_queue': 16,
+        'timeout': 120,
+    },
+    'embedding': {
+        'concurrency': int(os.environ.get('ROOMSCAPES_EMBED_CONCURRENCY', INFERENCE['max_batch'])),
+        'max_queue': 32,
+        'timeout': 60,
+    },
+    'packages': {
+        'concurrency': int(os.environ.get('ROOMSCAPES_PACKAGES_CONCURRENCY', 2)),
+        'max_queue': 8,
+        'timeout': 120,
+    },
+}
+
+# Per-upload detections/embedding/palette, shared by every session on this host.
+ANALYSIS_CACHE = {
+    'dir': os.path.join(BASE_DIR, 'cache', 'analysis'),
+    'max_bytes': int(os.environ.get('ROOMSCAPES_CACHE_MB', 512)) * 1024 * 1024,
+}
+
+# Product-image color job (extract_product_colors.py): downloads are cached by
+# content hash, pooled across `workers` threads and throttled to `rate` req/s.
+PRODUCT_IMAGES = {
+    'cache_dir': os.path.join(BASE_DIR, 'cache', 'product_images'),
+    'workers': 16,
+    'rate': 8.0,
+    'retries': 3,
+    'backoff': 0.5,
+    'timeout': 20,
+    'num_colors': 3,
+}
+
+# Product database; credentials come from the environment, never the code.
+DATABASE = {
+    'host': os.environ.get('ROOMSCAPES_DB_HOST', 'localhost'),
+    'user': os.environ.get('ROOMSCAPES_DB_USER', 'root'),
+    'password': os.environ.get('ROOMSCAPES_DB_PASSWORD', ''),
+    'database': os.environ.get('ROOMSCAPES_DB_NAME', 'product_db'),
+}
+
+# Where the color scripts read and write the product catalog (see
+# modules/catalog_writer.py): 'mysql', 'sqlite' or 'csv' (products.csv).
+CATALOG = {
+    'backend': os.environ.get('ROOMSCAPES_CATALOG', 'csv'),
+    'sqlite': os.environ.get('ROOMSCAPES_SQLITE', os.path.join(BASE_DIR, 'products.db')),
+    'chunk_size': 1000,
+}
+
+# Bump when the feature extractor or its preprocessing changes; stored
+# embeddings from another version are re-computed by update_embeddings.py.
+EMBEDDING_MODEL = 'resnet50-gmp-v1'
+
+# 'auto' serves the exported ONNX feature extractor when present (no TensorFlow
+# import in the app process) and falls back to Keras otherwise.
+RESNET_RUNTIME = os.environ.get('ROOMSCAPES_RESNET_RUNTIME', 'auto')
+
+# 'auto' serves the quantized OpenVINO detector written by export_yolo.py when
+# present and the PyTorch checkpoint otherwise; 'openvino' / 'pt' force one.
+YOLO_RUNTIME = os.environ.get('ROOMSCAPES_YOLO_RUNTIME', 'auto')
+
+# Similar-room search. 'flat' is exact; 'ivf' scans only the nprobe closest
+# clusters and keeps query latency flat as the room corpus grows; 'pq' keeps
+# m bytes per room (vs 8 KB) and re-ranks a shortlist exactly.
+INDEX = {
+    'kind': os.environ.get('ROOMSCAPES_INDEX', 'flat'),
+    'ivf': {'nlist': None, 'nprobe': 8},
+    'pq': {'m': 64, 'opq': False, 'rerank': 50},
 }
\ No newline at end of file
@@ -0,0 +1,71 @@
+import ast
+import functools
+import os
+import numpy as np
+import pandas as pd
+
+from .config import PATHS
+
+# Model class name -> name shown in the app (and used by the shopping-list mapping).
+OBJECT_DISPLAY_NAMES = {
+    "sofa": "Sofa",
+    "curtains": "Curtains",
+    "wooden-floor": "Wooden Floor",
+    "floor-lamps": "Nightstand",
+    "painting": "Painting",
+    "cabinet": "Cabinet",
+    "frame": "Frame",
+    "center-table": "Table",
+    "chair-wooden": "Chair"
+}
+
+
+def write_detections(images, sizes, counts, class_ids, confidences, boxes, class_names, path=PATHS['detections']):
+    """
+    Columnar detections for the room corpus: per-image rows (`images`,
+    `sizes`, `offsets`) index into flat per-detection columns (`class_ids`,
+    `confidences`, normalized xyxy `boxes`).
+    """
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    tmp_path = path + '.tmp.npz'
+    np.savez_compressed(
+        tmp_path,
+        images=np.asarray(images),
+        sizes=np.asarray(sizes, dtype=np.int32).reshape(-1, 2),
+        offsets=offsets,
+        class_ids=np.asarray(class_ids, dtype=np.int16),
+        confidences=np.asarray(confidences, dtype=np.float16),
+        boxes=np.asarray(boxes, dtype=np.float16).reshape(-1, 4),
+        class_names=np.asarray(class_names)
+    )
+    os.replace(tmp_path, path)
+
+
+def read_detections(path=PATHS['detections']):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+@functools.lru_cache(maxsize=2)
+def _objects_by_image(source, mtime):
+    if source.endswith('.npz'):
+        data = read_detections(source)
+        names = np.array([OBJECT_DISPLAY_NAMES.get(n, n) for n in data['class_names'].tolist()])
+        offsets = data['offsets']
+        return {
+            image: set(names[data['class_ids'][offsets[i]:offsets[i + 1]]].tolist())
+            for i, image in enumerate(data['images'].tolist())
+        }
+    df = pd.read_csv(source)
+    return dict(zip(df['image'], df['detected_objects'].apply(ast.literal_eval)))
+
+
+def objects_source():
+    """The columnar detections file when it has been built, else the legacy CSV."""
+    return PATHS['detections'] if os.path.exists(PATHS['detections']) else PATHS['objects_csv']
+
+
+def objects_by_image():
+    """image basename -> set of object names, parsed once per source file version."""
+    source = objects_source()
+    return _objects_by_image(source, os.stat(source).st_mtime_ns)
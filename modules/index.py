@@ -0,0 +1,378 @@
+import hashlib
+import os
+import numpy as np
+
+INDEX_VERSION = 1
+SCAN_BLOCK = 65536
+
+
+def _topk(scores, k):
+    """Return (indices, scores) of the k largest entries per row, best first."""
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+def _drop_masked(ids, scores):
+    """Rows excluded by a search mask score -inf; report them as id -1."""
+    ids[np.isneginf(scores)] = -1
+    return ids, scores
+
+
+def _as_queries(queries):
+    queries = np.asarray(queries, dtype=np.float32)
+    return queries[None, :] if queries.ndim == 1 else queries
+
+
+def fingerprint(vectors):
+    """Cheap identity of an embedding matrix, used to detect stale index files."""
+    step = max(1, len(vectors) // 64)
+    sample = np.ascontiguousarray(vectors[::step], dtype=np.float32)
+    digest = hashlib.sha1(sample.tobytes()).hexdigest()
+    return f"{len(vectors)}x{vectors.shape[1]}:{digest}"
+
+
+class FlatIndex:
+    """Exact inner-product search. Embeddings are L2-normalized, so this ranks
+    rooms exactly like the euclidean NearestNeighbors search it replaces."""
+    kind = 'flat'
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=5, mask=None):
+        # Scan in row blocks so a memory-mapped (possibly float16) store is
+        # never materialized as one float32 copy. `mask` (bool per room)
+        # restricts the scan to allowed rooms.
+        queries = _as_queries(queries)
+        best_ids, best_scores = None, None
+        for start in range(0, len(self.vectors), SCAN_BLOCK):
+            block = np.asarray(self.vectors[start:start + SCAN_BLOCK], dtype=np.float32)
+            scores = queries @ block.T
+            if mask is not None:
+                scores[:, ~mask[start:start + SCAN_BLOCK]] = -np.inf
+            ids, scores = _topk(scores, k)
+            ids += start
+            if best_ids is not None:
+                ids = np.concatenate([best_ids, ids], axis=1)
+                scores = np.concatenate([best_scores, scores], axis=1)
+                order, scores = _topk(scores, k)
+                ids = np.take_along_axis(ids, order, axis=1)
+            best_ids, best_scores = ids, scores
+        return _drop_masked(best_ids, best_scores)
+
+    def patch(self, vectors, old_to_new):
+        self.vectors = vectors
+        return self
+
+    def state(self):
+        return {}
+
+    @classmethod
+    def from_state(cls, vectors, data):
+        return cls(vectors)
+
+
+class IVFIndex:
+    """Approximate search: vectors are bucketed under k-means centroids and a
+    query only scans the `nprobe` closest buckets."""
+    kind = 'ivf'
+
+    def __init__(self, vectors, centroids, list_ids, list_offsets, nprobe=8):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.list_offsets = list_offsets
+        self.nprobe = nprobe
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def train(cls, vectors, nlist=None, nprobe=8, seed=0):
+        from sklearn.cluster import KMeans
+
+        data = np.asarray(vectors, dtype=np.float32)
+        nlist = nlist or max(1, int(4 * np.sqrt(len(data))))
+        nlist = min(nlist, len(data))
+        kmeans = KMeans(n_clusters=nlist, n_init=1, random_state=seed).fit(data)
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        list_ids, list_offsets = cls._build_lists(data, centroids)
+        return cls(vectors, centroids, list_ids, list_offsets, nprobe=nprobe)
+
+    @staticmethod
+    def _build_lists(data, centroids):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        list_ids = np.argsort(assign, kind='stable').astype(np.int64)
+        counts = np.bincount(assign, minlength=len(centroids))
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return list_ids, list_offsets
+
+    def _candidates(self, lists, mask):
+        candidates = np.concatenate([self.list_ids[self.list_offsets[p]:self.list_offsets[p + 1]] for p in lists])
+        return candidates if mask is None else candidates[mask[candidates]]
+
+    def search(self, queries, k=5, mask=None):
+        # With a mask, a selective filter can leave fewer than k allowed rooms
+        # in the nprobe closest buckets. If the allowed rooms are no more than
+        # a normal probe would scan, they are scored exactly; otherwise more
+        # buckets are probed, nearest first, until k allowed candidates are found.
+        queries = _as_queries(queries)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self.centroids))
+        if mask is not None:
+            allowed = np.flatnonzero(mask)
+            if len(allowed) <= nprobe * len(self.list_ids) / len(self.centroids):
+                if len(allowed):
+                    ids, top = _topk(queries @ np.asarray(self.vectors[allowed], dtype=np.float32).T, k)
+                    all_ids[:, :ids.shape[1]] = allowed[ids]
+                    all_scores[:, :ids.shape[1]] = top
+                return all_ids, all_scores
+        probes, _ = _topk(queries @ self.centroids.T, nprobe if mask is None else len(self.centroids))
+        for qi, query in enumerate(queries):
+            candidates = self._candidates(probes[qi, :nprobe], mask)
+            probed = nprobe
+            while len(candidates) < k and probed < probes.shape[1]:
+                candidates = np.concatenate([candidates, self._candidates(probes[qi, probed:probed + nprobe], mask)])
+                probed += nprobe
+            if len(candidates) == 0:
+                continue
+            scores = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+            ids, top = _topk(scores[None, :], k)
+            all_ids[qi, :ids.shape[1]] = candidates[ids[0]]
+            all_scores[qi, :ids.shape[1]] = top[0]
+        return all_ids, all_scores
+
+    def patch(self, vectors, old_to_new):
+        """
+        Update the inverted lists for a new store generation without retraining.
+        old_to_new maps each old row to its new row (-1 if deleted); rows of
+        `vectors` nobody maps to are new and get filed under their nearest centroid.
+        """
+        nlist = len(self.centroids)
+        list_of = np.repeat(np.arange(nlist), np.diff(self.list_offsets))
+        ids = old_to_new[self.list_ids]
+        keep = ids >= 0
+        ids, list_of = ids[keep], list_of[keep]
+
+        mapped = np.zeros(len(vectors), dtype=bool)
+        mapped[ids] = True
+        added = np.flatnonzero(~mapped)
+        if len(added):
+            added_vectors = np.asarray(vectors[added], dtype=np.float32)
+            ids = np.concatenate([ids, added])
+            list_of = np.concatenate([list_of, np.argmax(added_vectors @ self.centroids.T, axis=1)])
+
+        order = np.argsort(list_of, kind='stable')
+        self.list_ids = ids[order].astype(np.int64)
+        counts = np.bincount(list_of, minlength=nlist)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.vectors = vectors
+        return self
+
+    def state(self):
+        return {
+            'centroids': self.centroids,
+            'list_ids': self.list_ids,
+            'list_offsets': self.list_offsets,
+            'nprobe': np.int64(self.nprobe),
+        }
+
+    @classmethod
+    def from_state(cls, vectors, data):
+        return cls(vectors, data['centroids'], data['list_ids'], data['list_offsets'], nprobe=int(data['nprobe']))
+
+
+class PQIndex:
+    """
+    Compressed search: each vector is rotated (OPQ, optional) and stored as
+    `m` one-byte product-quantization codes. Queries are scored against the
+    codes with asymmetric distance tables, then the best `rerank` candidates
+    are re-scored exactly from the (memory-mapped) embedding store.
+    """
+    kind = 'pq'
+
+    def __init__(self, vectors, codebooks, codes, rotation=None, rerank=50):
+        self.vectors = vectors
+        self.codebooks = codebooks
+        self.codes = codes
+        self.rotation = rotation
+        self.rerank = rerank
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def bytes_per_vector(self):
+        return self.codes.shape[1] * self.codes.itemsize
+
+    @staticmethod
+    def _train_codebooks(data, m, ks, seed):
+        from sklearn.cluster import KMeans
+
+        dsub = data.shape[1] // m
+        codebooks = np.empty((m, ks, dsub), dtype=np.float32)
+        for j in range(m):
+            sub = data[:, j * dsub:(j + 1) * dsub]
+            codebooks[j] = KMeans(n_clusters=ks, n_init=1, max_iter=50, random_state=seed).fit(sub).cluster_centers_
+        return codebooks
+
+    @staticmethod
+    def _encode(data, codebooks):
+        m, ks, dsub = codebooks.shape
+        codes = np.empty((len(data), m), dtype=np.uint8)
+        for j in range(m):
+            sub = data[:, j * dsub:(j + 1) * dsub]
+            dists = (sub ** 2).sum(1, keepdims=True) - 2 * sub @ codebooks[j].T + (codebooks[j] ** 2).sum(1)
+            codes[:, j] = np.argmin(dists, axis=1)
+        return codes
+
+    @staticmethod
+    def _decode(codes, codebooks):
+        m = codebooks.shape[0]
+        return np.concatenate([codebooks[j][codes[:, j]] for j in range(m)], axis=1)
+
+    @classmethod
+    def train(cls, vectors, m=64, opq=False, opq_iters=4, rerank=50, sample=65536, seed=0):
+        data = np.asarray(vectors, dtype=np.float32)
+        if data.shape[1] % m:
+            raise ValueError(f"Dimension {data.shape[1]} is not divisible by m={m}")
+        rng = np.random.default_rng(seed)
+        train = data[rng.choice(len(data), min(sample, len(data)), replace=False)]
+        ks = min(256, len(train))
+
+        rotation = None
+        if opq:
+            # Alternate PQ training with an orthogonal Procrustes update of the rotation.
+            rotation = np.eye(data.shape[1], dtype=np.float32)
+            for _ in range(opq_iters):
+                rotated = train @ rotation
+                codebooks = cls._train_codebooks(rotated, m, ks, seed)
+                recon = cls._decode(cls._encode(rotated, codebooks), codebooks)
+                u, _, vt = np.linalg.svd(train.T @ recon)
+                rotation = (u @ vt).astype(np.float32)
+            data = data @ rotation
+            train = train @ rotation
+
+        codebooks = cls._train_codebooks(train, m, ks, seed)
+        codes = np.concatenate([
+            cls._encode(data[start:start + SCAN_BLOCK], codebooks) for start in range(0, len(data), SCAN_BLOCK)
+        ])
+        return cls(vectors, codebooks, codes, rotation=rotation, rerank=rerank)
+
+    def _rotate(self, data):
+        return data if self.rotation is None else data @ self.rotation
+
+    def search(self, queries, k=5, mask=None):
+        queries = _as_queries(queries)
+        rotated = self._rotate(queries)
+        m, ks, dsub = self.codebooks.shape
+        # (n, m, ks) inner products between each query sub-vector and each centroid.
+        tables = np.einsum('nmd,mkd->nmk', rotated.reshape(len(queries), m, dsub), self.codebooks)
+        shortlist = max(k, self.rerank) if self.vectors is not None else k
+        columns = np.arange(m)
+
+        best_ids, best_scores = None, None
+        for start in range(0, len(self.codes), SCAN_BLOCK):
+            block = self.codes[start:start + SCAN_BLOCK]
+            scores = np.stack([table[columns, block].sum(axis=1) for table in tables])
+            if mask is not None:
+                scores[:, ~mask[start:start + SCAN_BLOCK]] = -np.inf
+            ids, scores = _topk(scores, shortlist)
+            ids += start
+            if best_ids is not None:
+                ids = np.concatenate([best_ids, ids], axis=1)
+                order, scores = _topk(np.concatenate([best_scores, scores], axis=1), shortlist)
+                ids = np.take_along_axis(ids, order, axis=1)
+            best_ids, best_scores = ids, scores
+
+        if self.vectors is None or not self.rerank:
+            return _drop_masked(best_ids[:, :k], best_scores[:, :k])
+        # Sorted ids keep the memory-mapped reads sequential.
+        by_id = np.argsort(best_ids, axis=1)
+        candidates = np.take_along_axis(best_ids, by_id, axis=1)
+        allowed = np.isfinite(np.take_along_axis(best_scores, by_id, axis=1))
+        exact = np.stack([
+            np.asarray(self.vectors[row], dtype=np.float32) @ query
+            for row, query in zip(candidates, queries)
+        ])
+        exact[~allowed] = -np.inf
+        order, scores = _topk(exact, k)
+        return _drop_masked(np.take_along_axis(candidates, order, axis=1), scores)
+
+    def patch(self, vectors, old_to_new):
+        keep = old_to_new >= 0
+        codes = np.zeros((len(vectors), self.codes.shape[1]), dtype=np.uint8)
+        codes[old_to_new[keep]] = self.codes[keep]
+        mapped = np.zeros(len(vectors), dtype=bool)
+        mapped[old_to_new[keep]] = True
+        added = np.flatnonzero(~mapped)
+        if len(added):
+            codes[added] = self._encode(self._rotate(np.asarray(vectors[added], dtype=np.float32)), self.codebooks)
+        self.codes = codes
+        self.vectors = vectors
+        return self
+
+    def state(self):
+        state = {'codebooks': self.codebooks, 'codes': self.codes, 'rerank': np.int64(self.rerank)}
+        if self.rotation is not None:
+            state['rotation'] = self.rotation
+        return state
+
+    @classmethod
+    def from_state(cls, vectors, data):
+        rotation = data['rotation'] if 'rotation' in data else None
+        return cls(vectors, data['codebooks'], data['codes'], rotation=rotation, rerank=int(data['rerank']))
+
+
+INDEX_KINDS = {cls.kind: cls for cls in (FlatIndex, IVFIndex, PQIndex)}
+
+
+def build_index(vectors, kind='flat', **params):
+    if kind == 'flat':
+        return FlatIndex(vectors)
+    if kind in INDEX_KINDS:
+        return INDEX_KINDS[kind].train(vectors, **params)
+    raise ValueError(f"Unknown index kind: {kind}")
+
+
+def save_index(index, path):
+    """Persist index structure only; the vectors stay in the embedding file."""
+    tmp_path = path + '.tmp.npz'
+    np.savez(
+        tmp_path,
+        version=np.int64(INDEX_VERSION),
+        kind=np.array(index.kind),
+        fingerprint=np.array(fingerprint(index.vectors)),
+        **index.state()
+    )
+    os.replace(tmp_path, path)
+
+
+def load_index(path, vectors, check=True):
+    """
+    Load a saved index for `vectors`, or return None if missing or stale.
+    Pass check=False to load an index saved for an older store generation
+    (e.g. to patch it).
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if int(data['version']) != INDEX_VERSION:
+            return None
+        if check and str(data['fingerprint']) != fingerprint(vectors):
+            return None
+        kind = str(data['kind'])
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unknown index kind in {path}: {kind}")
+        return INDEX_KINDS[kind].from_state(vectors, data)
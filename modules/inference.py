@@ -0,0 +1,108 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from itertools import groupby
+
+import numpy as np
+
+from .config import INFERENCE
+
+
+class MicroBatcher:
+    """
+    One daemon thread owns a model. Requests queue up and are run together:
+    after the first one arrives, the thread waits up to `max_wait_ms` for
+    more, then calls `run_batch(items)` once for up to `max_batch` of them.
+    """
+
+    def __init__(self, run_batch, max_batch=INFERENCE['max_batch'], max_wait_ms=INFERENCE['max_wait_ms'], name='batcher'):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._serve, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            items, futures = zip(*batch)
+            try:
+                results = self.run_batch(list(items))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+
+class BatchedDetector:
+    """
+    Stands in for the shared YOLO model: `predict` and `names` behave the
+    same, so detect_objects/detect_tiled work unchanged, but every image is
+    queued and predicted on the batcher thread together with images from
+    other sessions that use the same settings.
+    """
+
+    def __init__(self, model, **batching):
+        self.model = model
+        self.names = model.names
+        self.batcher = MicroBatcher(self._run, name='yolo-batcher', **batching)
+
+    def _run(self, items):
+        results = [None] * len(items)
+        settings = lambda i: items[i][1]
+        for (conf, imgsz), group in groupby(sorted(range(len(items)), key=settings), key=settings):
+            group = list(group)
+            predicted = self.model.predict([items[i][0] for i in group], conf=conf, imgsz=imgsz, verbose=False)
+            for i, result in zip(group, predicted):
+                results[i] = result
+        return results
+
+    def predict(self, source, conf=0.25, imgsz=640, verbose=False):
+        images = source if isinstance(source, list) else [source]
+        futures = [self.batcher.submit((image, (conf, imgsz))) for image in images]
+        return [future.result() for future in futures]
+
+
+class BatchedEmbedder:
+    """Same for the feature extractor: rows of `predict(batch)` are stacked with other sessions' rows."""
+
+    def __init__(self, model, **batching):
+        self.model = model
+        self.batcher = MicroBatcher(self._run, name='resnet-batcher', **batching)
+
+    def _run(self, rows):
+        return list(self.model.predict(np.stack(rows), verbose=0))
+
+    def predict(self, batch, verbose=0):
+        futures = [self.batcher.submit(row) for row in np.asarray(batch, dtype=np.float32)]
+        return np.stack([future.result() for future in futures])
+
+
+class InferenceServer:
+    """Process-wide detection and embedding service; sessions only ever touch the wrappers."""
+
+    def __init__(self, yolo_model, resnet_model, **batching):
+        self.detector = BatchedDetector(yolo_model, **batching)
+        self.embedder = BatchedEmbedder(resnet_model, **batching)
@@ -1,26 +1,77 @@
+import os
 import streamlit as st
-import tensorflow as tf
-from tensorflow.keras.applications.resnet50 import ResNet50
-from tensorflow.keras.layers import GlobalMaxPooling2D
-from ultralytics import YOLO
-import pickle
-import numpy as np
-from modules.config import PATHS
+from modules.config import PATHS, INDEX, RESNET_RUNTIME, YOLO_RUNTIME
+from modules.index import build_index, load_index as read_index, save_index
+from modules.store import load_embeddings, store_version
+from modules.cache import AnalysisCache
+from modules.runtime import create_feature_extractor, yolo_model_path, load_yolo_model
+from modules.pipeline import UploadPipeline
+from modules.inference import InferenceServer
+from modules.object_index import load_object_bitmaps as read_object_bitmaps
 
 @st.cache_resource(show_spinner="🔍 Loading object detection model...")
 def load_yolo():
-    return YOLO(PATHS['yolo_model'])
+    return load_yolo_model(yolo_model_path(YOLO_RUNTIME))
+
+@st.cache_resource
+def load_inference_server():
+    # Sessions get batching wrappers; only the server's threads call the models themselves.
+    return InferenceServer(load_yolo(), load_resnet())
+
+@st.cache_resource
+def load_analysis_cache():
+    return AnalysisCache()
+
+@st.cache_resource
+def load_upload_pipeline():
+    return UploadPipeline(load_analysis_cache())
 
 @st.cache_resource(show_spinner="🧠 Loading feature extraction model...")
 def load_resnet():
-    model = ResNet50(weights='imagenet', include_top=False, input_shape=(224,224,3))
-    model.trainable = False
-    return tf.keras.Sequential([model, GlobalMaxPooling2D()])
+    return create_feature_extractor(RESNET_RUNTIME)
 
-@st.cache_resource(show_spinner="📂 Loading design database...")
 def load_features():
+    # Keyed on the store generation so an update_embeddings.py run is picked up without a restart.
+    return _load_features(store_version())
+
+@st.cache_resource(show_spinner="📂 Loading design database...", max_entries=1)
+def _load_features(version):
+    # The store is memory-mapped: no unpickling and no private copy per server process.
     with st.spinner("🔢 Processing image embeddings..."):
-        feature_list = np.array(pickle.load(open(PATHS['embeddings'], 'rb')))
-    with st.spinner("🏷️ Loading design catalog..."):
-        filenames = pickle.load(open(PATHS['filenames'], 'rb'))
-    return feature_list, filenames
\ No newline at end of file
+        feature_list, filenames = load_embeddings()
+    return feature_list, filenames
+
+def load_catalog():
+    return _load_catalog(store_version())
+
+@st.cache_resource(max_entries=1)
+def _load_catalog(version):
+    # Normalized paths and a basename -> row map, built once per store generation instead of every rerun.
+    _, filenames = _load_features(version)
+    paths = [path.replace('\\', '/') for path in filenames]
+    return paths, {os.path.basename(path): i for i, path in enumerate(paths)}
+
+def load_index():
+    return _load_index(store_version())
+
+@st.cache_resource(show_spinner="🗂️ Loading similar-room index...", max_entries=1)
+def _load_index(version):
+    # Built once per store generation (or offline with build_index.py) and only queried afterwards.
+    # A saved index is served whatever its kind; INDEX['kind'] only applies when (re)building.
+    feature_list, _ = _load_features(version)
+    index = read_index(PATHS['index'], feature_list)
+    if index is None:
+        index = build_index(feature_list, INDEX['kind'], **INDEX.get(INDEX['kind'], {}))
+        try:
+            save_index(index, PATHS['index'])
+        except OSError as e:
+            print(f"Could not save index: {e}")
+    return index
+
+def load_object_bitmaps():
+    return _load_object_bitmaps(store_version())
+
+@st.cache_resource(show_spinner="🏷️ Indexing room objects...", max_entries=1)
+def _load_object_bitmaps(version):
+    _, filenames = _load_features(version)
+    return read_object_bitmaps(filenames)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import numpy as np
+
+from .config import PATHS
+from .corpus_detections import objects_by_image as read_objects_by_image, objects_source
+
+
+def _basename(path):
+    return os.path.basename(path.replace('\\', '/'))
+
+
+class ObjectBitmaps:
+    """
+    One packed bitmap per object name, aligned with the rows of the embedding
+    store: bit i of `bits[j]` is set when room i contains object `names[j]`.
+    """
+
+    def __init__(self, names, bits, count):
+        self.names = list(names)
+        self.bits = bits
+        self.count = count
+        self._rows = {name: j for j, name in enumerate(self.names)}
+
+    @classmethod
+    def build(cls, filenames, objects_by_image):
+        names = sorted(set().union(*objects_by_image.values())) if objects_by_image else []
+        rows = {name: j for j, name in enumerate(names)}
+        dense = np.zeros((len(names), len(filenames)), dtype=bool)
+        for i, file in enumerate(filenames):
+            for name in objects_by_image.get(_basename(file), ()):
+                dense[rows[name], i] = True
+        return cls(names, np.packbits(dense, axis=1), len(filenames))
+
+    def mask(self, include=(), exclude=()):
+        """Rows that contain every object in `include` and none in `exclude`, or None if unfiltered."""
+        if not include and not exclude:
+            return None
+        packed = np.full(self.bits.shape[1], 0xFF, dtype=np.uint8)
+        for name in include:
+            if name not in self._rows:
+                return np.zeros(self.count, dtype=bool)
+            packed &= self.bits[self._rows[name]]
+        for name in exclude:
+            if name in self._rows:
+                packed &= ~self.bits[self._rows[name]]
+        return np.unpackbits(packed, count=self.count).astype(bool)
+
+
+def _source_key(filenames, source):
+    digest = hashlib.sha1('\n'.join(_basename(f) for f in filenames).encode())
+    digest.update(f"{source}:{os.stat(source).st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def load_object_bitmaps(filenames, path=PATHS['object_bitmaps']):
+    """Load the saved bitmaps for this catalog, rebuilding them if the catalog or detections changed."""
+    key = _source_key(filenames, objects_source())
+    if os.path.exists(path):
+        with np.load(path) as data:
+            if str(data['key']) == key:
+                return ObjectBitmaps(data['names'].tolist(), data['bits'], int(data['count']))
+    bitmaps = ObjectBitmaps.build(filenames, read_objects_by_image())
+    try:
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, key=np.array(key), names=np.array(bitmaps.names), bits=bitmaps.bits,
+                 count=np.int64(bitmaps.count))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save object bitmaps: {e}")
+    return bitmaps
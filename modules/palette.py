@@ -0,0 +1,140 @@
+import numpy as np
+from PIL import Image
+
+from .config import PALETTE
+
+
+def load_palette_pixels(image_path, max_pixels=PALETTE['max_pixels']):
+    """
+    (N, 3) uint8 RGB pixels of the image shrunk to about `max_pixels`.
+    Like ColorThief, pixels that are mostly transparent or almost white
+    are left out.
+    """
+    with Image.open(image_path) as img:
+        # Target size from the original dimensions: draft() shrinks img.width/height in place.
+        scale = (max_pixels / (img.width * img.height)) ** 0.5
+        size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        if scale < 1:
+            img.draft('RGB', size)
+            img.thumbnail(size)
+        rgba = np.asarray(img.convert('RGBA')).reshape(-1, 4)
+    keep = (rgba[:, 3] >= 125) & ~np.all(rgba[:, :3] > 250, axis=1)
+    return rgba[keep, :3]
+
+
+def median_cut(pixels, num_colors, sigbits=5, population_phase=0.75):
+    """
+    Modified median cut (the MMCQ scheme ColorThief uses) over a
+    2**sigbits-per-channel histogram, with each box's statistics computed
+    by array ops instead of Python loops over the color cube. Boxes are
+    first split by pixel count, then by count * volume so small but
+    distinct colors survive. Returns up to `num_colors` (r, g, b) tuples,
+    ordered like ColorThief's palette.
+    """
+    if len(pixels) == 0:
+        return []
+    shift = 8 - sigbits
+    quantized = (pixels >> shift).astype(np.int64)
+    codes = (quantized[:, 0] << (2 * sigbits)) | (quantized[:, 1] << sigbits) | quantized[:, 2]
+    bins, inverse, counts = np.unique(codes, return_inverse=True, return_counts=True)
+    mask = (1 << sigbits) - 1
+    bin_colors = np.stack([bins >> (2 * sigbits), (bins >> sigbits) & mask, bins & mask], axis=1)
+    bin_sums = np.zeros((len(bins), 3))
+    np.add.at(bin_sums, inverse.ravel(), pixels)
+
+    # A box is (lo, hi, member bins); lo/hi are inclusive bounds in the quantized cube.
+    def make_box(lo, hi, members):
+        return lo, hi, members, int(counts[members].sum()), int(np.prod(hi - lo + 1))
+
+    def cut(box):
+        lo, hi, members = box[:3]
+        channel = int(np.argmax(hi - lo))
+        values = bin_colors[members, channel]
+        partial = np.cumsum(np.bincount(values - lo[channel], weights=counts[members], minlength=hi[channel] - lo[channel] + 1))
+        total = partial[-1]
+        i = int(np.argmax(partial > total / 2))
+        left, right = i, len(partial) - 1 - i
+        d2 = min(len(partial) - 2, int(i + right / 2)) if left <= right else max(0, int(i - 1 - left / 2))
+        while d2 < len(partial) - 2 and partial[d2] == 0:
+            d2 += 1
+        while d2 > 0 and partial[d2] == total and partial[d2 - 1] > 0:
+            d2 -= 1
+        split = lo[channel] + d2
+        below = values <= split
+        hi1, lo2 = hi.copy(), lo.copy()
+        hi1[channel], lo2[channel] = split, split + 1
+        return make_box(lo, hi1, members[below]), make_box(lo2, hi, members[~below])
+
+    def split_until(boxes, target, key):
+        while len(boxes) < target:
+            splittable = [i for i, b in enumerate(boxes) if len(b[2]) > 1]
+            if not splittable:
+                break
+            box = boxes.pop(max(splittable, key=lambda i: key(boxes[i])))
+            boxes.extend(b for b in cut(box) if b[3] > 0)
+        return boxes
+
+    boxes = [make_box(bin_colors.min(axis=0), bin_colors.max(axis=0), np.arange(len(bins)))]
+    boxes = split_until(boxes, int(population_phase * num_colors), key=lambda b: b[3])
+    boxes = split_until(boxes, num_colors, key=lambda b: b[3] * b[4])
+
+    boxes.sort(key=lambda b: b[3] * b[4], reverse=True)
+    return [tuple(int(v) for v in bin_sums[b[2]].sum(axis=0) / b[3]) for b in boxes]
+
+
+def kmeans(pixels, num_colors, iterations=10):
+    """Lloyd's k-means seeded from the median-cut palette; (r, g, b) tuples, largest cluster first."""
+    if len(pixels) == 0:
+        return []
+    data = pixels.astype(np.float32)
+    centers = np.array(median_cut(pixels, num_colors), dtype=np.float32)
+    for _ in range(iterations):
+        distances = ((data[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        sizes = np.bincount(labels, minlength=len(centers))
+        sums = np.stack([np.bincount(labels, weights=data[:, c], minlength=len(centers)) for c in range(3)], axis=1)
+        moved = np.where(sizes[:, None] > 0, sums / np.maximum(sizes, 1)[:, None], centers)
+        if np.allclose(moved, centers, atol=0.5):
+            break
+        centers = moved
+    order = np.argsort(-np.bincount(labels, minlength=len(centers)), kind='stable')
+    return [tuple(int(round(v)) for v in centers[i]) for i in order]
+
+
+def object_palettes(rgb, boxes, class_ids, num_colors=PALETTE['num_colors'], max_pixels=PALETTE['max_pixels']):
+    """
+    One palette per detected class from an already decoded (H, W, 3) uint8
+    RGB image and normalized xyxy `boxes`. The image is subsampled once and
+    every pixel's membership in every class's boxes is computed in a single
+    broadcast, so no region is re-opened or cropped separately.
+    Returns {class_id: [(r, g, b), ...]}.
+    """
+    if len(boxes) == 0:
+        return {}
+    height, width = rgb.shape[:2]
+    step = max(1, int((height * width / max_pixels) ** 0.5))
+    small = rgb[::step, ::step]
+    ys = (np.arange(small.shape[0]) * step + step / 2) / height
+    xs = (np.arange(small.shape[1]) * step + step / 2) / width
+    boxes = np.asarray(boxes, dtype=np.float32)
+    inside_y = ((ys[:, None] >= boxes[:, 1]) & (ys[:, None] < boxes[:, 3])).astype(np.float32)
+    inside_x = ((xs[:, None] >= boxes[:, 0]) & (xs[:, None] < boxes[:, 2])).astype(np.float32)
+    classes = np.unique(class_ids)
+    members = (np.asarray(class_ids)[:, None] == classes[None, :]).astype(np.float32)
+    # (rows, cols, classes): number of boxes of each class covering each pixel.
+    cover = np.einsum('yb,xb,bc->yxc', inside_y, inside_x, members).reshape(-1, len(classes)) > 0
+    pixels = small.reshape(-1, 3)
+    cover &= ~np.all(pixels > 250, axis=1)[:, None]
+    return {int(c): median_cut(pixels[cover[:, i]], num_colors) for i, c in enumerate(classes)}
+
+
+PALETTE_METHODS = {'median_cut': median_cut, 'kmeans': kmeans}
+
+
+def extract_palette(image_path, num_colors=PALETTE['num_colors'], method=PALETTE['method']):
+    pixels = load_palette_pixels(image_path)
+    return PALETTE_METHODS[method](pixels, num_colors)
+
+
+def to_hex(color):
+    return "#{:02x}{:02x}{:02x}".format(*color)
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import PIPELINE
+from .admission import GATES
+from .utils import detect_objects, summarize_detections, feature_extraction, get_dominant_colors
+
+STAGES = ('detections', 'palette', 'embedding')
+
+
+class UploadPipeline:
+    """
+    Starts YOLO detection, palette extraction and ResNet embedding for an
+    upload at the same time on a shared worker pool. Each stage goes through
+    the analysis cache, so repeat uploads resolve immediately.
+    """
+
+    def __init__(self, cache, workers=PIPELINE['workers']):
+        self.cache = cache
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload-stage')
+
+    def submit(self, key, image_path, yolo_model, resnet_model):
+        """
+        Returns {stage: Future}; each future yields that stage's cached value.
+        Model stages wait their turn at the admission gates, tagged with `key`.
+        """
+        compute = {
+            'detections': lambda: GATES['detection'].run(
+                lambda: summarize_detections(detect_objects(image_path, yolo_model)), label=key),
+            'palette': lambda: get_dominant_colors(image_path),
+            'embedding': lambda: GATES['embedding'].run(feature_extraction, image_path, resnet_model, label=key),
+        }
+        return {
+            stage: self.pool.submit(self.cache.get_or_compute, key, stage, compute[stage])
+            for stage in STAGES
+        }
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .config import PRODUCT_IMAGES
+
+
+class ImageCache:
+    """
+    Content-addressed store of downloaded product images: bytes live under
+    their sha256, and `urls.json` maps each image URL to its digest, so a
+    re-run only downloads URLs it has never fetched (and identical images
+    behind different URLs are stored once).
+    """
+
+    def __init__(self, root=PRODUCT_IMAGES['cache_dir']):
+        self.root = root
+        self.index_path = os.path.join(root, 'urls.json')
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.urls = json.load(f)
+        except (OSError, ValueError):
+            self.urls = {}
+
+    def _blob(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def get(self, url):
+        """Local path of the cached image for `url`, or None."""
+        digest = self.urls.get(url)
+        if digest and os.path.exists(self._blob(digest)):
+            return self._blob(digest)
+        return None
+
+    def put(self, url, content):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.urls[url] = digest
+        return path
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.urls, f)
+            os.replace(tmp_path, self.index_path)
+
+
+class RateLimiter:
+    """Spaces calls to `wait()` at least 1/rate seconds apart, across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def http_session(pool_size, retries=PRODUCT_IMAGES['retries'], backoff=PRODUCT_IMAGES['backoff']):
+    """requests.Session with keep-alive pooling sized for `pool_size` threads and retry with backoff."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=('GET',), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
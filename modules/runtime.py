@@ -0,0 +1,83 @@
+import os
+import numpy as np
+
+from .config import PATHS, DETECTION
+
+
+class OnnxFeatureExtractor:
+    """
+    ResNet50 + GlobalMaxPooling2D exported to ONNX and run with onnxruntime
+    on CPU. Exposes the same `predict(batch, verbose=0)` call as the Keras
+    model, so feature_extraction and the builders work with either.
+    """
+
+    def __init__(self, model_path=PATHS['resnet_onnx'], threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, verbose=0):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def onnx_available(model_path=PATHS['resnet_onnx']):
+    if not os.path.exists(model_path):
+        return False
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_keras_resnet():
+    import tensorflow as tf
+    from tensorflow.keras.applications.resnet50 import ResNet50
+    from tensorflow.keras.layers import GlobalMaxPooling2D
+
+    model = ResNet50(weights='imagenet', include_top=False, input_shape=(224, 224, 3))
+    model.trainable = False
+    return tf.keras.Sequential([model, GlobalMaxPooling2D()])
+
+
+def create_feature_extractor(runtime='auto'):
+    """'onnx', 'keras', or 'auto' (ONNX when the exported model and onnxruntime are present)."""
+    if runtime == 'onnx' or (runtime == 'auto' and onnx_available()):
+        return OnnxFeatureExtractor()
+    if runtime in ('auto', 'keras'):
+        return build_keras_resnet()
+    raise ValueError(f"Unknown feature extractor runtime: {runtime}")
+
+
+def yolo_model_path(runtime='auto'):
+    """'pt', 'openvino', or 'auto' (the exported OpenVINO model when it has been built)."""
+    if runtime == 'openvino' or (runtime == 'auto' and os.path.isdir(PATHS['yolo_openvino'])):
+        return PATHS['yolo_openvino']
+    if runtime in ('auto', 'pt'):
+        return PATHS['yolo_model']
+    raise ValueError(f"Unknown detector runtime: {runtime}")
+
+
+def load_yolo_model(path, imgsz=DETECTION['imgsz']):
+    """Load a detector and run one inference so graph compilation and allocations happen before the first upload."""
+    from ultralytics import YOLO
+
+    model = YOLO(path, task='detect')
+    model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+    return model
+
+
+def model_version(path):
+    """Size and mtime of a model file, or of the newest file in an exported model directory."""
+    try:
+        files = [os.path.join(path, f) for f in os.listdir(path)] if os.path.isdir(path) else [path]
+        stats = [os.stat(f) for f in files]
+    except OSError:
+        return 'missing'
+    return f"{sum(s.st_size for s in stats)}-{max(s.st_mtime_ns for s in stats)}"
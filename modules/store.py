@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+
+from .config import PATHS, EMBEDDING_MODEL
+
+STORE_VERSION = 1
+STORE_DTYPES = ('float32', 'float16')
+
+
+def _data_path(path, generation):
+    if not generation:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-g{generation}{ext}"
+
+
+def _write_json(obj, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def write_store(vectors, filenames, dtype='float32', model=EMBEDDING_MODEL, generation=0,
+                path=PATHS['store'], meta_path=PATHS['store_meta']):
+    """
+    Write embeddings as one contiguous .npy matrix plus a JSON header holding
+    the format version, dtype, shape and filenames. Each generation gets its
+    own data file and the header is swapped last, so readers never pair a
+    header with the wrong matrix.
+    """
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Unsupported store dtype: {dtype}")
+    vectors = np.ascontiguousarray(vectors, dtype=dtype)
+    if vectors.ndim != 2 or len(vectors) != len(filenames):
+        raise ValueError(f"Expected {len(filenames)} row vectors, got shape {vectors.shape}")
+
+    previous = os.path.join(os.path.dirname(path), read_meta(meta_path)['data_file']) if store_exists(meta_path) else None
+
+    data_path = _data_path(path, generation)
+    tmp_path = data_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, vectors)
+    os.replace(tmp_path, data_path)
+
+    meta = {
+        'format_version': STORE_VERSION,
+        'generation': generation,
+        'data_file': os.path.basename(data_path),
+        'dtype': dtype,
+        'count': int(vectors.shape[0]),
+        'dim': int(vectors.shape[1]),
+        'model': model,
+        'filenames': list(filenames),
+    }
+    _write_json(meta, meta_path)
+
+    # Processes still mapping the old generation keep their pages until they reload.
+    if previous and os.path.abspath(previous) != os.path.abspath(data_path):
+        try:
+            os.remove(previous)
+        except OSError:
+            pass
+    return meta
+
+
+def read_meta(meta_path=PATHS['store_meta']):
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('format_version') != STORE_VERSION:
+        raise ValueError(f"Unsupported embedding store version: {meta.get('format_version')}")
+    meta.setdefault('generation', 0)
+    meta.setdefault('data_file', os.path.basename(PATHS['store']))
+    return meta
+
+
+def read_store(path=PATHS['store'], meta_path=PATHS['store_meta']):
+    """
+    Open the store read-only and memory-mapped: nothing is copied, and every
+    process mapping the file shares the same page-cache pages.
+    Returns: (vectors, filenames, meta)
+    """
+    meta = read_meta(meta_path)
+    data_path = os.path.join(os.path.dirname(path), meta['data_file'])
+    vectors = np.load(data_path, mmap_mode='r')
+    if vectors.shape != (meta['count'], meta['dim']) or vectors.dtype != np.dtype(meta['dtype']):
+        raise ValueError(f"Embedding store {data_path} does not match its header {meta_path}")
+    return vectors, meta['filenames'], meta
+
+
+def store_exists(meta_path=PATHS['store_meta']):
+    return os.path.exists(meta_path)
+
+
+def store_version(meta_path=PATHS['store_meta']):
+    """Cheap token that changes whenever a new store generation is published."""
+    try:
+        return os.stat(meta_path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def load_embeddings():
+    """Embeddings and filenames from the store, or from the legacy pickles if it was never built."""
+    if store_exists():
+        vectors, filenames, _ = read_store()
+        return vectors, filenames
+    vectors = np.array(pickle.load(open(PATHS['embeddings'], 'rb')), dtype=np.float32)
+    filenames = pickle.load(open(PATHS['filenames'], 'rb'))
+    return vectors, filenames
+
+
+def hash_file(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(manifest_path=PATHS['manifest']):
+    """Per-image content hash and model version of everything in the store."""
+    if not os.path.exists(manifest_path):
+        return {'generation': 0, 'images': {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def write_manifest(generation, images, manifest_path=PATHS['manifest']):
+    _write_json({'generation': generation, 'images': images}, manifest_path)
@@ -0,0 +1,39 @@
+import os
+from PIL import Image
+
+from .config import THUMBNAILS
+
+
+def thumbnail_file(image_path, size, root=THUMBNAILS['dir']):
+    name = os.path.splitext(os.path.basename(image_path))[0] + '.jpg'
+    return os.path.join(root, str(size), name)
+
+
+def thumbnail_path(image_path, size=THUMBNAILS['display']):
+    """Pre-built thumbnail for an inspiration image, or the original if none was generated."""
+    path = thumbnail_file(image_path, size)
+    return path if os.path.exists(path) else image_path
+
+
+def make_thumbnails(image_path, sizes=THUMBNAILS['sizes'], quality=THUMBNAILS['quality'], root=THUMBNAILS['dir']):
+    """Write every pyramid level for one image, largest first, each downscaled from the previous level."""
+    with Image.open(image_path) as img:
+        # JPEG draft mode lets libjpeg decode at a reduced scale instead of full resolution.
+        img.draft('RGB', (max(sizes), max(sizes)))
+        img = img.convert('RGB')
+        for size in sorted(sizes, reverse=True):
+            img.thumbnail((size, size), Image.LANCZOS)
+            path = thumbnail_file(image_path, size, root)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            img.save(tmp_path, format='JPEG', quality=quality, optimize=True)
+            os.replace(tmp_path, path)
+
+
+def is_fresh(image_path, sizes=THUMBNAILS['sizes'], root=THUMBNAILS['dir']):
+    source = os.path.getmtime(image_path)
+    for size in sizes:
+        path = thumbnail_file(image_path, size, root)
+        if not os.path.exists(path) or os.path.getmtime(path) < source:
+            return False
+    return True
@@ -1,78 +1,262 @@
+import hashlib
 import os
+import threading
 import numpy as np
 import pandas as pd
-import ast
-from PIL import Image
-from tensorflow.keras.preprocessing import image
-from tensorflow.keras.applications.resnet50 import preprocess_input
-from sklearn.neighbors import NearestNeighbors
+from PIL import Image, ImageOps
 from numpy.linalg import norm
 
 from colorthief import ColorThief
 import webcolors
 import io
 
-from .config import PATHS
+from .config import DETECTION, PALETTE
+from .index import FlatIndex
+from .corpus_detections import objects_by_image
+from .palette import extract_palette, object_palettes, to_hex
 
 def save_uploaded_file(uploaded_file):
+    """
+    Saves the upload as uploads/<sha256><ext>. Naming by content means two
+    sessions uploading different photos under the same file name never
+    overwrite each other, and the path always holds the bytes it was keyed by.
+    """
     try:
         upload_dir = os.path.join('uploads')
         os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, uploaded_file.name)
-        with open(file_path, 'wb') as f:
-            f.write(uploaded_file.getbuffer())
+        content = uploaded_file.getvalue()
+        ext = os.path.splitext(uploaded_file.name)[1].lower()
+        file_path = os.path.join(upload_dir, hashlib.sha256(content).hexdigest() + ext)
+        if not os.path.exists(file_path):
+            tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, file_path)
         return file_path
     except Exception as e:
         raise RuntimeError(f"File save error: {e}")
 
+# ImageNet channel means, BGR order ("caffe" preprocessing used by Keras' ResNet50)
+RESNET_MEAN_BGR = np.array([103.939, 116.779, 123.68], dtype=np.float32)
+
+def preprocess_image(img_path):
+    # Decode + resize + ResNet preprocessing for one image; safe to run in worker threads.
+    # Same as keras load_img(target_size=(224, 224)) + preprocess_input, without importing TensorFlow.
+    with Image.open(img_path) as img:
+        img = img.convert('RGB').resize((224, 224), Image.NEAREST)
+        img_array = np.asarray(img, dtype=np.float32)
+    return img_array[..., ::-1] - RESNET_MEAN_BGR
+
 def feature_extraction(img_path, model):
     try:
-        img = image.load_img(img_path, target_size=(224, 224))
-        img_array = image.img_to_array(img)
-        expanded_img_array = np.expand_dims(img_array, axis=0)
-        preprocessed_img = preprocess_input(expanded_img_array)
+        preprocessed_img = np.expand_dims(preprocess_image(img_path), axis=0)
         result = model.predict(preprocessed_img, verbose=0).flatten()
         return result / norm(result)
     except Exception as e:
         raise RuntimeError(f"Feature extraction error: {e}")
 
-def recommend(features, feature_list):
-    neighbors = NearestNeighbors(n_neighbors=5, algorithm='brute', metric='euclidean')
-    neighbors.fit(feature_list)
-    distances, indices = neighbors.kneighbors([features])
-    return indices[0]
+def batch_feature_extraction(img_paths, model, pool=None, batch_size=64):
+    """
+    Embed many images, `batch_size` per forward pass. With a `pool`, decoding
+    runs in worker threads and overlaps with inference on the previous batch.
+    Returns an (N, 2048) float32 array of unit vectors.
+    """
+    try:
+        batches = [img_paths[i:i + batch_size] for i in range(0, len(img_paths), batch_size)]
+        if not batches:
+            return np.empty((0, 0), dtype=np.float32)
+        load = (lambda paths: list(pool.map(preprocess_image, paths))) if pool else (lambda paths: [preprocess_image(p) for p in paths])
+        pending = load(batches[0])
+        features = []
+        for i in range(len(batches)):
+            if pool and i + 1 < len(batches):
+                upcoming = [pool.submit(preprocess_image, p) for p in batches[i + 1]]
+            result = model.predict(np.stack(pending), verbose=0)
+            features.append(result / norm(result, axis=1, keepdims=True))
+            if i + 1 < len(batches):
+                pending = [f.result() for f in upcoming] if pool else load(batches[i + 1])
+        return np.concatenate(features).astype(np.float32)
+    except Exception as e:
+        raise RuntimeError(f"Batch feature extraction error: {e}")
+
+def recommend(features, index, k=5, mask=None):
+    # `index` is a prebuilt search index; a raw embedding matrix is searched exactly.
+    # `mask` (see ObjectBitmaps.mask) limits the scan to rooms with/without given objects.
+    if isinstance(index, np.ndarray):
+        index = FlatIndex(index)
+    indices, scores = index.search(features, k=k, mask=mask)
+    return indices[0][indices[0] >= 0]
+
+def batch_recommend(features, index, k=5, block=256, exclude_self=False, mask=None):
+    """
+    Top-k similar rooms for each row of an (N, d) query matrix. Queries are
+    answered `block` rows at a time, each block as one matrix multiply plus
+    argpartition against the corpus. With exclude_self, row i is assumed to
+    be corpus room i (neighbor lists) and is dropped from its own results.
+    Returns: (N, k) array of corpus indices (-1 where `mask` leaves fewer than k rooms)
+    """
+    if isinstance(index, np.ndarray):
+        index = FlatIndex(index)
+    features = np.asarray(features, dtype=np.float32)
+    extra = 1 if exclude_self else 0
+    results = np.empty((len(features), k), dtype=np.int64)
+    for start in range(0, len(features), block):
+        indices, _ = index.search(features[start:start + block], k=k + extra, mask=mask)
+        if exclude_self:
+            rows = np.arange(start, start + len(indices))[:, None]
+            own = indices == rows
+            # Drop the query's own row if present, otherwise the last (k+1-th) hit.
+            own[~own.any(axis=1), -1] = True
+            indices = indices[~own].reshape(len(indices), k)
+        results[start:start + len(indices)] = indices
+    return results
+
+def load_detection_image(image_path, max_side=None):
+    """
+    Decode an image as a BGR array (what YOLO expects) with its longest side
+    at most `max_side`. thumbnail() puts JPEGs in draft mode, so libjpeg
+    downscales by 1/2, 1/4 or 1/8 while decoding instead of after. The
+    EXIF Orientation tag is applied, so portrait phone photos come out upright.
+    """
+    with Image.open(image_path) as img:
+        if max_side:
+            img.thumbnail((max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        return np.ascontiguousarray(np.asarray(img.convert('RGB'))[..., ::-1])
+
+def _tiles(height, width, size, overlap):
+    step = max(1, int(size * (1 - overlap)))
+    ys = list(range(0, max(height - size, 0) + 1, step))
+    xs = list(range(0, max(width - size, 0) + 1, step))
+    if ys[-1] + size < height:
+        ys.append(height - size)
+    if xs[-1] + size < width:
+        xs.append(width - size)
+    return [(y, x) for y in ys for x in xs]
+
+def nms(boxes, scores, classes, iou=0.5):
+    """Class-aware greedy non-maximum suppression. Returns kept indices, best first."""
+    # Offsetting each class far apart lets one pass handle all classes.
+    shifted = boxes + (classes * (boxes.max() + 1))[:, None]
+    areas = (shifted[:, 2] - shifted[:, 0]) * (shifted[:, 3] - shifted[:, 1])
+    order = np.argsort(-scores)
+    keep = []
+    while len(order):
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        x1 = np.maximum(shifted[i, 0], shifted[rest, 0])
+        y1 = np.maximum(shifted[i, 1], shifted[rest, 1])
+        x2 = np.minimum(shifted[i, 2], shifted[rest, 2])
+        y2 = np.minimum(shifted[i, 3], shifted[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        overlap = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[overlap <= iou]
+    return np.array(keep, dtype=np.int64)
+
+def detect_tiled(image, model, conf, imgsz, tile_size, overlap, iou):
+    """
+    Full-frame pass for large objects plus overlapping tiles at native
+    resolution for small ones (clocks, frames), merged with cross-tile NMS.
+    """
+    import torch
+    from ultralytics.engine.results import Results
 
-def detect_objects(image_path, model):
-    results = model.predict(image_path, conf=0.3)[0]
+    height, width = image.shape[:2]
+    origins = _tiles(height, width, tile_size, overlap)
+    crops = [image[y:y + tile_size, x:x + tile_size] for y, x in origins]
+    found = [model.predict(image, conf=conf, imgsz=imgsz, verbose=False)[0].boxes.data.cpu().numpy()]
+    for (y, x), result in zip(origins, model.predict(crops, conf=conf, imgsz=tile_size, verbose=False)):
+        data = result.boxes.data.cpu().numpy().copy()
+        data[:, [0, 2]] += x
+        data[:, [1, 3]] += y
+        found.append(data)
+    data = np.concatenate(found)
+    if len(data):
+        data = data[nms(data[:, :4], data[:, 4], data[:, 5], iou)]
+    return Results(image, path=None, names=model.names, boxes=torch.from_numpy(data.astype(np.float32)))
+
+def detect_objects(image_path, model, imgsz=DETECTION['imgsz'], tile=DETECTION['tile']):
+    conf = DETECTION['conf']
+    # Decode just large enough for the inference size (or the tile grid when tiling).
+    max_side = DETECTION['tile_decode'] if tile else imgsz
+    image = load_detection_image(image_path, max_side if DETECTION['draft'] else None)
+    if tile and max(image.shape[:2]) > DETECTION['tile_size']:
+        results = detect_tiled(image, model, conf, imgsz, DETECTION['tile_size'], DETECTION['tile_overlap'], DETECTION['iou'])
+    else:
+        results = model.predict(image, conf=conf, imgsz=imgsz)[0]
+    results.path = image_path
     return results
 
+def summarize_detections(results):
+    """
+    Compact, picklable record of a YOLO result built with whole-array ops:
+    int16 class ids, float16 scores and normalized float32 xyxy boxes, plus
+    a hex palette per detected class. The Results object itself drags the
+    full decoded image along.
+    """
+    boxes = results.boxes
+    record = {
+        'class_ids': boxes.cls.cpu().numpy().astype(np.int16),
+        'scores': boxes.conf.cpu().numpy().astype(np.float16),
+        'boxes': boxes.xyxyn.cpu().numpy().astype(np.float32).reshape(-1, 4),
+        'names': dict(results.names),
+    }
+    # Per-object colors from the image YOLO already decoded (BGR) and its boxes.
+    palettes = object_palettes(results.orig_img[..., ::-1], record['boxes'], record['class_ids'])
+    record['object_palettes'] = {
+        record['names'][c]: [to_hex(color) for color in palette] for c, palette in palettes.items()
+    }
+    return record
+
+def detection_labels(record):
+    """Class name of every detection, in record order."""
+    return [record['names'][int(c)] for c in record['class_ids'].tolist()]
+
+def render_detections(image_path, record, max_side=DETECTION['render_side'], quality=85):
+    """Draw a detection record onto the image; returns JPEG bytes. Only called when the image is shown."""
+    import torch
+    from ultralytics.engine.results import Results
+
+    image = load_detection_image(image_path, max_side)
+    height, width = image.shape[:2]
+    data = np.concatenate([
+        record['boxes'] * np.array([width, height, width, height], dtype=np.float32),
+        record['scores'].astype(np.float32)[:, None],
+        record['class_ids'].astype(np.float32)[:, None],
+    ], axis=1)
+    annotated = Results(image, path=None, names=record['names'], boxes=torch.from_numpy(data)).plot()
+    buffer = io.BytesIO()
+    Image.fromarray(annotated[..., ::-1]).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
 def get_recommended_objects(detected_img):
     try:
-        df = pd.read_csv(PATHS['objects_csv'])
-        df['detected_objects'] = df['detected_objects'].apply(ast.literal_eval)
-        options = df[df['image'].isin(detected_img)]['detected_objects'].values
-        return set().union(*options)
+        objects = objects_by_image()
+        return set().union(*(objects.get(img, set()) for img in detected_img))
     except Exception as e:
         raise RuntimeError(f"Object recommendation error: {e}")
 
 
 
-def get_dominant_colors(image_path, num_colors=4):
+def get_dominant_colors(image_path, num_colors=PALETTE['num_colors'], method=PALETTE['method']):
     """
     Extract dominant colors from an image
     Returns: List of hex color codes
     """
     try:
-        color_thief = ColorThief(image_path)
-        palette = color_thief.get_palette(color_count=num_colors, quality=1)
-        
+        if method == 'colorthief':
+            color_thief = ColorThief(image_path)
+            palette = color_thief.get_palette(color_count=num_colors, quality=PALETTE['quality'])
+        else:
+            palette = extract_palette(image_path, num_colors, method)
+
         # Convert RGB to hex
         hex_colors = []
         for color in palette:
             try:
                 hex_colors.append(webcolors.rgb_to_hex(color))
             except:
-                hex_colors.append(f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}")
+                hex_colors.append(to_hex(color))
         
         return hex_colors[:num_colors] 
     
@@ -125,7 +125,11 @@ def color_preferences_section(category_colors):
                     st.session_state.color_prefs.pop(cat, None)
                     continue
                 
-                defaults = [c for c in st.session_state.dominant_colors if c in colors] or colors
+                # The object's own colors when it was detected in the photo, else the whole room's.
+                object_colors = st.session_state.get("object_colors", {}).get(cat, [])
+                defaults = ([c for c in object_colors if c in colors]
+                            or [c for c in st.session_state.dominant_colors if c in colors]
+                            or colors)
                 key = f"color_family_{cat}"
                 if key not in st.session_state:
                     st.session_state[key] = defaults
@@ -183,7 +187,9 @@ def generate_packages(category_colors, df):
                         selected = available
                     package["categories"][cat] = {
                         "selected_colors": list(selected),
-                        "not_selected_colors": list(available - selected)
+                        "not_selected_colors": list(available - selected),
+                        # The object's colors in the photo if it was detected, else the room palette.
+                        "target_hex": st.session_state.get("object_hex", {}).get(cat) or st.session_state.get("room_hex", [])
                     }
 
                 st.session_state.package_summary = package
@@ -2,7 +2,9 @@ import streamlit as st
 import pandas as pd
 import random
 import os
-from algorithm import genetic_algorithm
+from algorithm import genetic_algorithm_array as genetic_algorithm
+from modules.admission import GATES, QueueFull, AdmissionTimeout
+from modules.color_match import ProductColors, target_lab
 
 st.set_page_config(
     page_title="RoomScapes AI - Packages", 
@@ -270,6 +272,13 @@ def load_products(csv_path="products.csv"):
 
 products_df = load_products()
 
+@st.cache_resource
+def load_product_colors(df):
+    # Lab palettes for the whole catalog, computed once per products.csv version.
+    return ProductColors(df)
+
+product_colors = load_product_colors(products_df)
+
 # Main title with animation
 st.markdown("""
 <div style="animation: fadeIn 0.8s ease-out; ">
@@ -279,6 +288,9 @@ st.markdown("""
 
 """, unsafe_allow_html=True)
 
+# Each package picks at random among this many best color matches per category.
+AFFINITY_SHORTLIST = 3
+
 def create_bundle(pkg, summary, used_products, min_max):
     bundle = {'user': {}, 'extra': {}}
     current_used = used_products.copy()
@@ -300,20 +312,19 @@ def create_bundle(pkg, summary, used_products, min_max):
             (products_df['price'] <= budget) &
             (products_df['price'] >= min_price)
         ]
-        rows = []
-        for _, row in filtered.iterrows():
-            if row['color'] in colors and row['product_name'] not in current_used:
-                rows.append(row)
-        if len(rows) == 0:
-            rows = []
-            for _, row in filtered.iterrows():
-                if row['color'] in colors:
-                    rows.append(row)
-        if len(rows) == 0:
-            rows = []
-            for _, row in filtered.iterrows():
-                rows.append(row)
-        if len(rows) > 0:
+        if len(filtered) > 0:
+            # Rank by ΔE to the room/object colors. The chosen families are enforced by the tiers below,
+            # so affinity only orders products within a tier. Shuffling first breaks ties at random:
+            # products without a hex palette share their family's centroid and score alike.
+            targets = target_lab(cat_info.get('target_hex', []), colors)
+            shuffled = filtered.iloc[random.sample(range(len(filtered)), len(filtered))]
+            ranked = shuffled.assign(color_affinity=product_colors.affinity(shuffled.index, targets))
+            ranked = ranked.sort_values('color_affinity', ascending=False, kind='stable')
+            # Chosen families still come first (unused, then any), and only then the rest of the category.
+            in_family = ranked['color'].isin(colors)
+            fresh = ~ranked['product_name'].isin(current_used)
+            tier = next(t for t in (ranked[in_family & fresh], ranked[in_family], ranked) if len(t) > 0)
+            rows = [row for _, row in tier.head(AFFINITY_SHORTLIST).iterrows()]
             chosen = random.choice(rows)
             bundle['user'][category] = chosen.to_dict()
             current_used.add(chosen['product_name'])
@@ -438,16 +449,24 @@ else:
             min_max[cat] = (100, 10000)
     
     # Generate packages with loading animation
+    line = st.empty()
     with st.spinner("🧬 Generating personalized design packages..."):
-        packages = genetic_algorithm(
-            selected_categories, 
-            extra_categories, 
-            avg_prices, 
-            min_max, 
-            total_budget, 
-            population_size=50, 
-            generations=100
-        )
+        try:
+            packages = GATES['packages'].run(
+                genetic_algorithm,
+                selected_categories,
+                extra_categories,
+                avg_prices,
+                min_max,
+                total_budget,
+                population_size=50,
+                generations=100,
+                on_wait=lambda position: line.caption(f"⏳ Busy right now: you are #{position} in line for package generation.")
+            )
+        except (QueueFull, AdmissionTimeout) as e:
+            st.error(f"❌ {e}")
+            st.stop()
+    line.empty()
     
     if not packages:
         st.warning("⚠️ No packages generated with current constraints")
@@ -0,0 +1,71 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modules.config import PATHS, EMBEDDING_MODEL
+from modules.index import load_index, save_index
+from modules.models import load_resnet
+from modules.store import (
+    load_embeddings, read_manifest, write_manifest, write_store, read_meta, store_exists, hash_file
+)
+from modules.utils import batch_feature_extraction
+
+parser = argparse.ArgumentParser(description="Embed only new or changed room images and patch the store and index.")
+parser.add_argument('--images', default='Livingroom', help="Folder of room images")
+parser.add_argument('--batch-size', type=int, default=64, help="Images per ResNet forward pass")
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Hashing/preprocess threads")
+parser.add_argument('--float16', action='store_true', help="Store vectors as float16")
+args = parser.parse_args()
+
+
+def normalize(path):
+    return path.replace('\\', '/')
+
+
+manifest = read_manifest()
+vectors, filenames = load_embeddings()
+old_rows = {normalize(f): i for i, f in enumerate(filenames)}
+dtype = 'float16' if args.float16 else (read_meta()['dtype'] if store_exists() else 'float32')
+
+current = sorted(normalize(os.path.join(args.images, file)) for file in os.listdir(args.images))
+with ThreadPoolExecutor(max_workers=args.workers) as pool:
+    hashes = dict(zip(current, pool.map(hash_file, current)))
+
+keep, embed = [], []
+for file in current:
+    entry = manifest['images'].get(file)
+    unchanged = entry and entry['sha1'] == hashes[file] and entry['model'] == EMBEDDING_MODEL
+    (keep if unchanged and file in old_rows else embed).append(file)
+deleted = set(old_rows) - set(current)
+print(f"🔄 {len(keep)} unchanged, {len(embed)} new or changed, {len(deleted)} deleted.")
+
+if not embed and not deleted:
+    print("✅ Embedding store is up to date.")
+    raise SystemExit
+
+if embed:
+    model = load_resnet()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        new_vectors = batch_feature_extraction(embed, model, pool, args.batch_size)
+else:
+    new_vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+
+kept_rows = np.array([old_rows[f] for f in keep], dtype=np.int64)
+stacked = np.concatenate([np.asarray(vectors[kept_rows], dtype=np.float32), new_vectors]).astype(dtype)
+old_to_new = np.full(len(filenames), -1, dtype=np.int64)
+old_to_new[kept_rows] = np.arange(len(keep))
+
+# Patch and save the index before publishing the store so the app never
+# reloads a new generation without a matching index.
+index = load_index(PATHS['index'], vectors)
+if index is not None:
+    save_index(index.patch(stacked, old_to_new), PATHS['index'])
+    print(f"🗂️ Patched {index.kind} index in place.")
+
+generation = manifest['generation'] + 1
+new_filenames = keep + embed
+meta = write_store(stacked, new_filenames, dtype=dtype, generation=generation)
+write_manifest(generation, {f: {'sha1': hashes[f], 'model': EMBEDDING_MODEL} for f in new_filenames})
+print(f"✅ Published generation {generation}: {meta['count']} embeddings. Running apps reload it on their next rerun.")